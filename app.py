@@ -1,10 +1,17 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
+import os
+import uuid
+
+from budgetbuddy.history import BudgetHistory, month_index
+from budgetbuddy.peers import PeerIndex
+from budgetbuddy.projection import project_savings
+from budgetbuddy.sessions import RecentKeys, SessionData, SessionRegistry
+from budgetbuddy.metrics import ENABLED as METRICS_ENABLED, metrics, start_exporters_from_env
+from budgetbuddy import (
+    AIBudgetAdvisor, AnalysisCache, IngestQueue, RingBufferStatsStore, SketchStatsStore, SQLiteStatsStore,
+    UserStatistics
+)
 
 # Page configuration
 st.set_page_config(
@@ -14,446 +21,123 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS with animations and responsive design
-st.markdown("""
-<style>
-    /* Main Styles */
-    .main-header {
-        font-size: 3.5rem;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        margin-bottom: 1rem;
-        font-weight: 800;
-        animation: fadeIn 1s ease-in;
-    }
-    
-    .sub-header {
-        font-size: 1.3rem;
-        color: #666;
-        text-align: center;
-        margin-bottom: 3rem;
-        animation: slideUp 1s ease-out;
-    }
-    
-    /* Animation Keyframes */
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(-20px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    @keyframes slideUp {
-        from { opacity: 0; transform: translateY(30px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-        100% { transform: scale(1); }
-    }
-    
-    @keyframes bounce {
-        0%, 20%, 50%, 80%, 100% {transform: translateY(0);}
-        40% {transform: translateY(-10px);}
-        60% {transform: translateY(-5px);}
-    }
-    
-    /* Hero Section */
-    .hero-section {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 4rem 2rem;
-        border-radius: 20px;
-        color: white;
-        text-align: center;
-        margin-bottom: 3rem;
-        animation: fadeIn 1.5s ease-in;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-    }
-    
-    .hero-title {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin-bottom: 1rem;
-    }
-    
-    .hero-subtitle {
-        font-size: 1.2rem;
-        opacity: 0.9;
-        margin-bottom: 2rem;
-    }
-    
-    /* Feature Cards */
-    .feature-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 15px;
-        box-shadow: 0 5px 20px rgba(0,0,0,0.1);
-        text-align: center;
-        transition: all 0.3s ease;
-        border: 2px solid transparent;
-        height: 100%;
-        animation: slideUp 0.8s ease-out;
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-10px);
-        box-shadow: 0 15px 40px rgba(0,0,0,0.15);
-        border-color: #667eea;
-        animation: pulse 2s infinite;
-    }
-    
-    .feature-icon {
-        font-size: 3rem;
-        margin-bottom: 1rem;
-        animation: bounce 2s infinite;
-    }
-    
-    /* Interactive Elements */
-    .ai-recommendation {
-        background: linear-gradient(135deg, #e8f4fd 0%, #d4e7fa 100%);
-        padding: 1.5rem;
-        border-left: 5px solid #667eea;
-        margin: 1rem 0;
-        border-radius: 10px;
-        transition: all 0.3s ease;
-        animation: slideUp 0.6s ease-out;
-    }
-    
-    .ai-recommendation:hover {
-        transform: translateX(10px);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-    }
-    
-    .resource-card {
-        background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        border-left: 4px solid #28a745;
-        margin: 1rem 0;
-        transition: all 0.3s ease;
-        animation: slideUp 0.7s ease-out;
-    }
-    
-    .resource-card:hover {
-        transform: scale(1.02);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
-    }
-    
-    .resource-link {
-        display: inline-block;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 0.75rem 1.5rem;
-        border-radius: 25px;
-        text-decoration: none;
-        font-weight: 600;
-        transition: all 0.3s ease;
-        margin-top: 1rem;
-    }
-    
-    .resource-link:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        color: white;
-        text-decoration: none;
-    }
-    
-    .stat-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 2rem 1rem;
-        border-radius: 15px;
-        text-align: center;
-        margin: 0.5rem;
-        transition: all 0.3s ease;
-        animation: slideUp 0.8s ease-out;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .stat-card::before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: linear-gradient(45deg, transparent, rgba(255,255,255,0.1), transparent);
-        transform: rotate(45deg);
-        transition: all 0.6s ease;
-    }
-    
-    .stat-card:hover::before {
-        transform: rotate(45deg) translate(50%, 50%);
-    }
-    
-    .stat-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
-    }
-    
-    /* Buttons */
-    .stButton button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        padding: 0.75rem 2rem;
-        border-radius: 50px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-        animation: fadeIn 1s ease-in;
-    }
-    
-    .stButton button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-    }
-    
-    .secondary-button {
-        background: linear-gradient(135deg, #6c757d 0%, #495057 100%) !important;
-    }
-    
-    .secondary-button:hover {
-        background: linear-gradient(135deg, #495057 0%, #6c757d 100%) !important;
-    }
-    
-    /* Sidebar Enhancements */
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #f8f9fa 0%, #e9ecef 100%);
-    }
-    
-    .sidebar-section {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        box-shadow: 0 3px 10px rgba(0,0,0,0.1);
-        transition: all 0.3s ease;
-    }
-    
-    .sidebar-section:hover {
-        transform: translateX(5px);
-        box-shadow: 0 5px 20px rgba(0,0,0,0.15);
-    }
-    
-    /* Progress Bars */
-    .progress-container {
-        background: #e9ecef;
-        border-radius: 10px;
-        overflow: hidden;
-        height: 20px;
-        margin: 1rem 0;
-        position: relative;
-    }
-    
-    .progress-fill {
-        background: linear-gradient(90deg, #28a745, #20c997);
-        height: 100%;
-        transition: width 1s ease-in-out;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .progress-fill::after {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.4), transparent);
-        animation: shimmer 2s infinite;
-    }
-    
-    @keyframes shimmer {
-        0% { transform: translateX(-100%); }
-        100% { transform: translateX(400%); }
-    }
-    
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .main-header {
-            font-size: 2.5rem;
-        }
-        
-        .hero-title {
-            font-size: 2rem;
-        }
-        
-        .feature-card {
-            margin-bottom: 1rem;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-class AIBudgetAdvisor:
-    def __init__(self):
-        self.income_categories = ['Salary', 'Business', 'Agriculture', 'Daily Wage', 'Other']
-        self.expense_categories = ['Food', 'Housing', 'Transport', 'Healthcare', 'Education', 'Utilities', 'Other']
-        
-        self.country_data = {
-            'India': {'currency': '₹', 'currency_name': 'Indian Rupee', 'symbol': '₹'},
-            'United States': {'currency': '$', 'currency_name': 'US Dollar', 'symbol': '$'},
-            'United Kingdom': {'currency': '£', 'currency_name': 'British Pound', 'symbol': '£'},
-            'European Union': {'currency': '€', 'currency_name': 'Euro', 'symbol': '€'},
-            'Japan': {'currency': '¥', 'currency_name': 'Japanese Yen', 'symbol': '¥'},
-            'Canada': {'currency': 'C$', 'currency_name': 'Canadian Dollar', 'symbol': 'C$'},
-            'Australia': {'currency': 'A$', 'currency_name': 'Australian Dollar', 'symbol': 'A$'},
-            'Nigeria': {'currency': '₦', 'currency_name': 'Nigerian Naira', 'symbol': '₦'},
-            'Kenya': {'currency': 'KSh', 'currency_name': 'Kenyan Shilling', 'symbol': 'KSh'},
-            'Custom': {'currency': '', 'currency_name': 'Custom Currency', 'symbol': ''}
-        }
-        
-        self.learning_resources = {
-            'beginner': [
-                {
-                    'title': 'Khan Academy - Personal Finance',
-                    'url': 'https://www.khanacademy.org/college-careers-more/personal-finance',
-                    'description': 'Free comprehensive personal finance course',
-                    'level': 'Beginner',
-                    'duration': '20 hours',
-                    'icon': '🎓'
-                },
-                {
-                    'title': 'Coursera - Financial Planning',
-                    'url': 'https://www.coursera.org/learn/financial-planning',
-                    'description': 'Professional financial planning course',
-                    'level': 'Beginner',
-                    'duration': '15 hours',
-                    'icon': '📊'
-                }
-            ],
-            'intermediate': [
-                {
-                    'title': 'edX - Personal Finance',
-                    'url': 'https://www.edx.org/learn/personal-finance',
-                    'description': 'University-level personal finance courses',
-                    'level': 'Intermediate',
-                    'duration': '30 hours',
-                    'icon': '🏫'
-                },
-                {
-                    'title': 'Udemy - Personal Finance Masterclass',
-                    'url': 'https://www.udemy.com/course/personal-finance/',
-                    'description': 'Comprehensive personal finance and budgeting',
-                    'level': 'Intermediate',
-                    'duration': '12 hours',
-                    'icon': '💡'
-                }
-            ],
-            'advanced': [
-                {
-                    'title': 'Investopedia Academy',
-                    'url': 'https://academy.investopedia.com',
-                    'description': 'Advanced investment and wealth management strategies',
-                    'level': 'Advanced',
-                    'duration': '25 hours',
-                    'icon': '💼'
-                },
-                {
-                    'title': 'MIT OpenCourseWare - Finance',
-                    'url': 'https://ocw.mit.edu/courses/finance/',
-                    'description': 'Advanced financial theory and applications',
-                    'level': 'Advanced',
-                    'duration': '40 hours',
-                    'icon': '🎯'
-                }
-            ]
-        }
-
-    def get_currency_symbol(self, country):
-        return self.country_data.get(country, {'currency': '$', 'symbol': '$'})['currency']
-    
-    def get_currency_display(self, country):
-        return self.country_data.get(country, {'currency': '$', 'currency_name': 'US Dollar', 'symbol': '$'})
-    
-    def analyze_spending_patterns(self, income, expenses, country, family_size):
-        total_income = sum(income.values())
-        total_expenses = sum(expenses.values())
-        savings = total_income - total_expenses
-        
-        recommendations = []
-        savings_ratio = savings / total_income if total_income > 0 else 0
-        
-        poverty_lines = {
-            'India': 5000, 'United States': 25000, 'United Kingdom': 18000,
-            'European Union': 20000, 'Japan': 22000, 'Canada': 20000,
-            'Australia': 22000, 'Nigeria': 4000, 'Kenya': 3500, 'Custom': 5000
-        }
-        
-        poverty_line = poverty_lines.get(country, 5000)
-        adjusted_poverty_line = poverty_line * (family_size / 4)
-        
-        # Check if income is zero to avoid division errors
-        if total_income == 0:
-            recommendations.append("💡 **Start Tracking**: Begin by entering your income to get personalized recommendations")
-            recommendations.append("🎯 **Priority**: Focus on establishing a stable income source")
-        else:
-            if total_income < adjusted_poverty_line:
-                recommendations.append("🎯 **Priority**: Focus on essential needs first and explore assistance programs.")
-            
-            if savings_ratio < 0.1:
-                recommendations.append("💡 **Emergency Fund**: Try to save at least 10% of your income for emergencies")
-            
-            # Safe division checks for expense ratios
-            food_ratio = expenses.get('Food', 0) / total_income if total_income > 0 else 0
-            if food_ratio > 0.4:
-                recommendations.append("🍲 **Food Budget**: Consider buying in bulk or exploring local markets")
-            
-            transport_ratio = expenses.get('Transport', 0) / total_income if total_income > 0 else 0
-            if transport_ratio > 0.2:
-                recommendations.append("🚌 **Transport**: Consider carpooling or public transport to reduce costs")
-            
-            utilities_ratio = expenses.get('Utilities', 0) / total_income if total_income > 0 else 0
-            if utilities_ratio > 0.15:
-                recommendations.append("⚡ **Utilities**: Look into energy-efficient appliances and practices")
-            
-            if savings_ratio > 0.2:
-                recommendations.append("🌟 **Great Job!**: You're saving well. Consider small investments")
-        
-        return {
-            'savings': savings,
-            'savings_ratio': savings_ratio,
-            'recommendations': recommendations,
-            'financial_health': 'Good' if savings_ratio >= 0.1 else 'Needs Improvement',
-            'poverty_line': adjusted_poverty_line,
-            'above_poverty_line': total_income >= adjusted_poverty_line,
-            'total_income': total_income,
-            'total_expenses': total_expenses
-        }
-
-class UserStatistics:
-    def __init__(self):
-        self.user_data = []
-    
-    def add_user_data(self, country, income_level, savings_ratio, financial_health):
-        self.user_data.append({
-            'country': country,
-            'income_level': income_level,
-            'savings_ratio': savings_ratio,
-            'financial_health': financial_health,
-            'timestamp': datetime.now()
-        })
-    
-    def get_statistics(self):
-        if not self.user_data:
-            return None
-            
-        df = pd.DataFrame(self.user_data)
-        
-        stats = {
-            'total_users': len(self.user_data),
-            'countries_represented': df['country'].nunique(),
-            'avg_savings_ratio': df['savings_ratio'].mean(),
-            'financial_health_distribution': df['financial_health'].value_counts().to_dict(),
-            'top_countries': df['country'].value_counts().head(5).to_dict()
-        }
-        return stats
+# Custom CSS with animations and responsive design lives in static/budgetbuddy.css.
+# With static serving on (.streamlit/config.toml) each browser fetches and caches
+# it once; otherwise it is inlined from a copy read once per process.
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'budgetbuddy.css')
+
+@st.cache_resource
+def stylesheet_tag():
+    if st.get_option('server.enableStaticServing'):
+        # The version query makes browsers refetch after the file changes
+        version = int(os.path.getmtime(CSS_PATH))
+        return f'<link rel="stylesheet" href="app/static/budgetbuddy.css?v={version}">'
+    with open(CSS_PATH, encoding='utf-8') as f:
+        return f"<style>\n{f.read()}</style>"
 
+st.markdown(stylesheet_tag(), unsafe_allow_html=True)
+
+# Set BUDGETBUDDY_STATS_DB to an empty string to keep stats in memory only
+STATS_DB_PATH = os.environ.get('BUDGETBUDDY_STATS_DB', 'budgetbuddy_stats.db')
+# Set BUDGETBUDDY_STATS_SKETCH=1 for approximate all-time stats in bounded memory
+STATS_SKETCH = os.environ.get('BUDGETBUDDY_STATS_SKETCH', '') not in ('', '0', 'false')
+
+@st.cache_resource
+def get_stats_store():
+    """Process-wide stats store shared by every session, written from a background queue"""
+    if STATS_SKETCH:
+        store = SketchStatsStore()
+    elif STATS_DB_PATH:
+        store = SQLiteStatsStore(STATS_DB_PATH, get_advisor().currencies)
+    else:
+        store = RingBufferStatsStore()
+    ingest = IngestQueue(store)
+    metrics.register_gauges('stats_ingest', ingest.stats)
+    return ingest
+
+@st.cache_resource
+def get_user_statistics():
+    """Process-wide view of the community stats; sessions hold no records of their own"""
+    return UserStatistics(get_stats_store(), get_advisor().currencies)
+
+# Fewer peers than this and the comparison is not shown
+MIN_PEERS = 5
+
+@st.cache_resource
+def get_peer_index():
+    """Process-wide percentile index of the analyses recorded so far, per peer segment.
+    
+    Only this server process's analyses since it started are included: the
+    index is not rebuilt from the stats store (whose records have no family
+    size, location or expense shares) and is not shared between processes.
+    """
+    index = PeerIndex(get_advisor().expense_categories)
+    metrics.register_gauges('peer_index', index.stats)
+    return index
+
+# Per-session caps and idle eviction for the state kept in the session registry
+SESSION_IDLE_SECONDS = float(os.environ.get('BUDGETBUDDY_SESSION_IDLE_SECONDS', 1800))
+MAX_SESSIONS = 1000
+MAX_RECORDED_ANALYSES = 256
+HISTORY_MONTHS = 24
+
+@st.cache_resource
+def get_session_registry():
+    """Process-wide registry of the per-session state that grows with use"""
+    categories = get_advisor().expense_categories
+    registry = SessionRegistry(
+        lambda: SessionData(
+            BudgetHistory(categories, max_months=HISTORY_MONTHS), RecentKeys(MAX_RECORDED_ANALYSES)
+        ),
+        idle_ttl=SESSION_IDLE_SECONDS, max_sessions=MAX_SESSIONS
+    )
+    metrics.register_gauges('session_registry', registry.stats)
+    return registry
+
+@st.cache_resource
+def get_advisor():
+    """Process-wide advisor; its reference data is read-only after construction"""
+    with metrics.span('advisor_construction'):
+        return AIBudgetAdvisor()
+
+@st.cache_resource
+def get_analysis_cache():
+    """Process-wide analysis cache shared by every session"""
+    cache = AnalysisCache()
+    metrics.register_gauges('analysis_cache', cache.stats)
+    return cache
+
+@st.cache_resource
+def start_metrics_exporters():
+    """Start the Prometheus/JSON exporters once per process (see budgetbuddy.metrics)"""
+    start_exporters_from_env()
+
+# Figures are memoized on their inputs and shared read-only across sessions;
+# st.plotly_chart copies the figure before serializing it. budgetbuddy.charts
+# (plotly and pandas) is imported on first use so the landing page never loads it.
+@st.cache_resource(max_entries=1024)
+def income_expense_figure(total_income, total_expenses, currency_symbol):
+    from budgetbuddy import charts
+    return charts.income_expense_figure(total_income, total_expenses, currency_symbol)
+
+@st.cache_resource(max_entries=1024)
+def expense_figure(expense_items, currency_symbol):
+    from budgetbuddy import charts
+    return charts.expense_figure(expense_items, currency_symbol)
+
+@st.cache_resource(max_entries=256)
+def health_figure(health_items):
+    from budgetbuddy import charts
+    return charts.health_figure(health_items)
+
+@st.cache_resource(max_entries=256)
+def savings_projection(total_income, total_expenses, years, currency_symbol):
+    """Monte Carlo projection and its figure, cached per input set"""
+    from budgetbuddy import charts
+    projection = project_savings(total_income, total_expenses, years=years)
+    return projection, charts.projection_figure(projection, currency_symbol)
+
+@metrics.timed('render_hero')
 def display_hero_section():
     """Display beautiful hero section"""
     st.markdown("""
@@ -463,6 +147,7 @@ def display_hero_section():
     </div>
     """, unsafe_allow_html=True)
 
+@metrics.timed('render_features')
 def display_features():
     """Display feature cards"""
     st.markdown("""
@@ -500,6 +185,7 @@ def display_features():
         </div>
         """, unsafe_allow_html=True)
 
+@metrics.timed('render_learning_resources')
 def display_learning_resources(ai_advisor):
     """Display external learning resources with all levels"""
     st.markdown("---")
@@ -548,13 +234,24 @@ def display_learning_resources(ai_advisor):
                 </div>
                 """, unsafe_allow_html=True)
 
+# How often the community statistics refresh while the analysis view is open
+STATS_REFRESH_SECONDS = 30
+
+# Community statistics periods and the UserStatistics window behind each
+STATS_PERIODS = {'All time': None, 'Last hour': 'hour', 'Last day': 'day', 'Last week': 'week'}
+
+@metrics.timed('render_statistics')
 def display_statistics(user_stats):
     """Display user statistics"""
     st.markdown("---")
     st.header("📊 Global Community Insights")
     st.info("Anonymous insights from BudgetBuddy users worldwide")
     
-    stats = user_stats.get_statistics()
+    period = st.radio("Period", list(STATS_PERIODS), horizontal=True, key="stats_period")
+    if STATS_PERIODS[period] is None:
+        stats = user_stats.get_statistics()
+    else:
+        stats = user_stats.get_window_statistics(STATS_PERIODS[period])
     if not stats:
         st.info("No statistics available yet. Be the first to contribute!")
         return
@@ -578,6 +275,7 @@ def display_statistics(user_stats):
             <p>Countries</p>
         </div>
         """, unsafe_allow_html=True)
+        st.caption(f"Avg income {stats['avg_income_base']:,.0f} {user_stats.currencies.base}/month")
     
     with col3:
         st.markdown(f"""
@@ -587,6 +285,8 @@ def display_statistics(user_stats):
             <p>Avg Savings Rate</p>
         </div>
         """, unsafe_allow_html=True)
+        if stats.get('median_savings_ratio') is not None:
+            st.caption(f"Median {stats['median_savings_ratio']:.1%}")
     
     with col4:
         healthy_users = stats['financial_health_distribution'].get('Good', 0)
@@ -599,16 +299,11 @@ def display_statistics(user_stats):
         </div>
         """, unsafe_allow_html=True)
     
-    # Additional charts
-    if stats['financial_health_distribution']:
+    # Additional charts, only sent to the browser when asked for
+    if stats['financial_health_distribution'] and st.toggle("Show health distribution chart", key="show_health_chart"):
         col1, col2 = st.columns(2)
         with col1:
-            health_data = pd.DataFrame({
-                'Health Status': list(stats['financial_health_distribution'].keys()),
-                'Count': list(stats['financial_health_distribution'].values())
-            })
-            fig_health = px.pie(health_data, values='Count', names='Health Status', 
-                              title='Financial Health Distribution')
+            fig_health = health_figure(tuple(stats['financial_health_distribution'].items()))
             st.plotly_chart(fig_health, use_container_width=True)
 
 def initialize_session_state():
@@ -617,83 +312,67 @@ def initialize_session_state():
         st.session_state.analyze = False
     if 'country' not in st.session_state:
         st.session_state.country = 'India'
-    if 'user_stats' not in st.session_state:
-        st.session_state.user_stats = UserStatistics()
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
 
 def clear_form():
-    """Clear all form inputs and reset analysis"""
+    """Clear all form inputs and reset analysis (used as a widget callback)"""
     st.session_state.analyze = False
     # Clear all input fields by resetting their values
     for key in list(st.session_state.keys()):
         if key.startswith('inc_') or key.startswith('exp_'):
             st.session_state[key] = 0
-    st.rerun()
+
+def start_analysis(country):
+    """Show the analysis for the submitted budget (used as a widget callback)"""
+    st.session_state.analyze = True
+    st.session_state.country = country
 
 def go_home():
     """Return to home page"""
     st.session_state.analyze = False
     st.rerun()
 
-def main():
-    # Main header with animations
-    st.markdown('<h1 class="main-header">💰 BudgetBuddy AI</h1>', unsafe_allow_html=True)
-    st.markdown('<div class="sub-header">Smart Financial Planning for Everyone</div>', unsafe_allow_html=True)
-    
-    # Initialize systems
-    ai_advisor = AIBudgetAdvisor()
-    initialize_session_state()
+def display_sidebar(ai_advisor):
+    """Profile and budget inputs; returns (country, family_size, location_type, month, income, expenses)"""
+    st.markdown("""
+    <div style="text-align: center; margin-bottom: 2rem;">
+        <h2 style="color: #333;">🌎 Your Profile</h2>
+    </div>
+    """, unsafe_allow_html=True)
     
-    # Show hero section and features when no analysis is done
-    if not st.session_state.analyze:
-        display_hero_section()
-        display_features()
-        
-        # Quick start CTA
-        st.markdown("---")
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col2:
-            st.markdown("""
-            <div style="text-align: center;">
-                <h3>Ready to Transform Your Finances?</h3>
-                <p>Get started with our AI-powered budget analysis in just a few clicks!</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # This button should work now
-            if st.button("🚀 Start Your Analysis Now", use_container_width=True, type="primary"):
-                st.session_state.analyze = True
-                st.rerun()
-        
-        # Show learning resources on homepage
-        display_learning_resources(ai_advisor)
+    # Country Selection (outside the form so the currency labels follow it)
+    country = st.selectbox(
+        "Select Your Country",
+        list(ai_advisor.country_data.keys()),
+        index=0
+    )
+    
+    # Display currency information
+    currency_info = ai_advisor.get_currency_display(country)
+    st.markdown(f"""
+    <div class="sidebar-section">
+        <h4>💰 Currency</h4>
+        <p>{currency_info['currency_name']} ({currency_info['symbol']})</p>
+    </div>
+    """, unsafe_allow_html=True)
     
-    # Sidebar - Always visible and enhanced
-    with st.sidebar:
-        st.markdown("""
-        <div style="text-align: center; margin-bottom: 2rem;">
-            <h2 style="color: #333;">🌎 Your Profile</h2>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Country Selection
-        country = st.selectbox(
-            "Select Your Country",
-            list(ai_advisor.country_data.keys()),
-            index=0
-        )
-        
-        # Display currency information
-        currency_info = ai_advisor.get_currency_display(country)
-        st.markdown(f"""
-        <div class="sidebar-section">
-            <h4>💰 Currency</h4>
-            <p>{currency_info['currency_name']} ({currency_info['symbol']})</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
+    # Edits inside the form don't rerun the app; only the buttons below submit it
+    with st.form("budget_form", border=False):
         # Family information
         family_size = st.slider("Family Size", 1, 10, 4, key="family_size")
         location_type = st.selectbox("Location Type", ["Urban", "Rural", "Semi-Urban"], key="location")
+        # Budgets entered for successive months build the trends shown with the analysis
+        today = datetime.now()
+        months = [
+            f"{(today.year * 12 + today.month - 1 - i) // 12}-{(today.month - 1 - i) % 12 + 1:02d}"
+            for i in range(HISTORY_MONTHS)
+        ]
+        month = st.selectbox(
+            "Budget Month", months, key="budget_month",
+            format_func=lambda value: datetime.strptime(value, "%Y-%m").strftime("%B %Y"),
+            help="Enter budgets month by month, oldest first, to see your trends"
+        )
         
         # Financial inputs
         st.markdown("""
@@ -708,7 +387,6 @@ def main():
             income[category] = st.number_input(
                 f"{category} ({currency_symbol})", 
                 min_value=0, 
-                value=0, 
                 key=f"inc_{category}"
             )
         
@@ -723,149 +401,300 @@ def main():
             expenses[category] = st.number_input(
                 f"{category} ({currency_symbol})", 
                 min_value=0, 
-                value=0, 
                 key=f"exp_{category}"
             )
         
         # Action buttons in sidebar
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("🔍 Analyze Budget", use_container_width=True, type="primary"):
-                st.session_state.analyze = True
-                st.session_state.country = country
-                st.rerun()
-        
+            st.form_submit_button("🔍 Analyze Budget", use_container_width=True, type="primary",
+                                  on_click=start_analysis, args=(country,))
         with col2:
-            if st.button("🗑️ Clear Form", use_container_width=True):
-                clear_form()
+            st.form_submit_button("🗑️ Clear Form", use_container_width=True, on_click=clear_form)
     
-    # Main content when analysis is done
-    if st.session_state.analyze:
-        # Action buttons at top
-        col1, col2, col3 = st.columns([1, 1, 1])
-        with col1:
-            if st.button("🏠 Home", use_container_width=True):
-                go_home()
-        with col2:
-            if st.button("🔄 New Analysis", use_container_width=True):
-                clear_form()
-        with col3:
-            if st.button("📊 View Statistics", use_container_width=True):
-                # Scroll to statistics section
-                st.rerun()
-        
-        # AI Analysis with error handling
-        try:
+    return country, family_size, location_type, month, income, expenses
+
+def display_budget_trends(history):
+    """Rolling savings ratios and month-over-month changes once there are two months of history"""
+    month_over_month = history.month_over_month()
+    if month_over_month is None:
+        return
+    
+    st.subheader("📅 Your Budget Trends")
+    columns = st.columns(len(history.windows))
+    for col, window in zip(columns, history.windows):
+        with col:
+            st.metric(
+                f"{window}-Month Avg Savings Rate",
+                f"{history.rolling_savings_ratio(window):.1%}",
+                delta=(
+                    f"{month_over_month['savings_ratio']:+.1%} vs "
+                    f"{month_over_month['previous_month'].strftime('%B %Y')}"
+                ) if window == history.windows[0] else None
+            )
+    
+    trends = history.category_trends(history.windows[0])
+    rising = [category for category, change in trends.items() if change > 0.05]
+    if rising:
+        st.info(f"📈 Spending share rising over the last {history.windows[0]} months: {', '.join(rising)}")
+
+@st.fragment
+@metrics.timed('render_analysis')
+def display_analysis(ai_advisor, income, expenses, country, family_size, location_type, month, currency_symbol):
+    """Analysis pane; its own widgets rerun only this fragment"""
+    # Action buttons at top
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        if st.button("🏠 Home", use_container_width=True):
+            go_home()
+    with col2:
+        if st.button("🔄 New Analysis", use_container_width=True, on_click=clear_form):
+            st.rerun()
+    with col3:
+        if st.button("📊 View Statistics", use_container_width=True):
+            # Refresh the statistics section along with the rest of the page
+            st.rerun()
+    
+    # AI Analysis with error handling
+    try:
+        cache = get_analysis_cache()
+        cache_key = AnalysisCache.make_key(income, expenses, country, family_size, location_type)
+        analysis = cache.get(cache_key)
+        if analysis is None:
             analysis = ai_advisor.analyze_spending_patterns(
                 income, expenses, 
-                st.session_state.country, 
-                family_size
+                country, 
+                family_size,
+                location_type
             )
-            
-            # Add to statistics
-            st.session_state.user_stats.add_user_data(
-                st.session_state.country,
+            cache.put(cache_key, analysis)
+        
+        # Add to statistics once per distinct input set in this session
+        session = get_session_registry().get(st.session_state.session_id)
+        if cache_key not in session.recorded_analyses:
+            session.recorded_analyses.add(cache_key)
+            get_user_statistics().add_user_data(
+                country,
                 analysis['total_income'],
                 analysis['savings_ratio'],
                 analysis['financial_health']
             )
-            
-            # Financial Summary with enhanced visuals
-            st.header("📈 Your Financial Analysis")
-            
-            summary_col1, summary_col2, summary_col3, summary_col4 = st.columns(4)
-            
-            with summary_col1:
-                st.metric("Total Monthly Income", f"{currency_symbol}{analysis['total_income']:,}")
-            
-            with summary_col2:
-                st.metric("Total Monthly Expenses", f"{currency_symbol}{analysis['total_expenses']:,}")
-            
-            with summary_col3:
-                st.metric("Monthly Savings", f"{currency_symbol}{analysis['savings']:,}", 
-                         delta=f"{analysis['savings_ratio']:.1%}")
-            
-            with summary_col4:
-                poverty_status = "Above" if analysis['above_poverty_line'] else "Below"
-                poverty_color = "normal" if analysis['above_poverty_line'] else "off"
-                st.metric(
-                    "Poverty Line Status", 
-                    poverty_status,
-                    delta=f"Est: {currency_symbol}{analysis['poverty_line']:,.0f}",
-                    delta_color=poverty_color
-                )
-            
-            # Visualizations
-            if analysis['total_income'] > 0 or analysis['total_expenses'] > 0:
+            get_peer_index().add(
+                country, family_size, location_type,
+                analysis['savings_ratio'], expenses, analysis['total_income']
+            )
+        
+        # Financial Summary with enhanced visuals
+        st.header("📈 Your Financial Analysis")
+        
+        summary_col1, summary_col2, summary_col3, summary_col4 = st.columns(4)
+        
+        with summary_col1:
+            st.metric("Total Monthly Income", f"{currency_symbol}{analysis['total_income']:,}")
+        
+        with summary_col2:
+            st.metric("Total Monthly Expenses", f"{currency_symbol}{analysis['total_expenses']:,}")
+        
+        with summary_col3:
+            st.metric("Monthly Savings", f"{currency_symbol}{analysis['savings']:,}", 
+                     delta=f"{analysis['savings_ratio']:.1%}")
+        
+        with summary_col4:
+            poverty_status = "Above" if analysis['above_poverty_line'] else "Below"
+            poverty_color = "normal" if analysis['above_poverty_line'] else "off"
+            st.metric(
+                "Poverty Line Status", 
+                poverty_status,
+                delta=f"Est: {currency_symbol}{analysis['poverty_line']:,.0f}",
+                delta_color=poverty_color
+            )
+        
+        # Visualizations, built only while the charts toggle is on
+        has_data = analysis['total_income'] > 0 or analysis['total_expenses'] > 0
+        if has_data and st.toggle("📊 Show charts", value=True, key="show_analysis_charts"):
+            with metrics.span('render_charts'):
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    fig_compare = go.Figure()
-                    fig_compare.add_trace(go.Bar(
-                        name='Income',
-                        x=['Total'],
-                        y=[analysis['total_income']],
-                        marker_color='#28a745'
-                    ))
-                    fig_compare.add_trace(go.Bar(
-                        name='Expenses',
-                        x=['Total'],
-                        y=[analysis['total_expenses']],
-                        marker_color='#dc3545'
-                    ))
-                    fig_compare.update_layout(
-                        title=f"Income vs Expenses ({currency_symbol})",
-                        yaxis_title=f"Amount ({currency_symbol})"
+                    fig_compare = income_expense_figure(
+                        analysis['total_income'], analysis['total_expenses'], currency_symbol
                     )
                     st.plotly_chart(fig_compare, use_container_width=True)
                 
                 with col2:
-                    expense_data = {k: v for k, v in expenses.items() if v > 0}
-                    if expense_data:
-                        fig_expenses = px.pie(
-                            values=list(expense_data.values()),
-                            names=list(expense_data.keys()),
-                            title=f"Expense Distribution ({currency_symbol})"
-                        )
+                    expense_items = tuple((k, v) for k, v in expenses.items() if v > 0)
+                    if expense_items:
+                        fig_expenses = expense_figure(expense_items, currency_symbol)
                         st.plotly_chart(fig_expenses, use_container_width=True)
                     else:
                         st.info("No expense data to display")
-            
-            # AI Recommendations with enhanced styling
-            st.header("🤖 Your Personalized Recommendations")
-            if analysis['recommendations']:
-                for recommendation in analysis['recommendations']:
-                    st.markdown(f'<div class="ai-recommendation">{recommendation}</div>', 
-                               unsafe_allow_html=True)
+        
+        # AI Recommendations with enhanced styling
+        st.header("🤖 Your Personalized Recommendations")
+        if analysis['recommendations']:
+            for recommendation in analysis['recommendations']:
+                st.markdown(f'<div class="ai-recommendation">{recommendation}</div>', 
+                           unsafe_allow_html=True)
+        else:
+            st.info("Enter your income and expenses to get personalized recommendations")
+
+        # Where this budget falls among households like it
+        # This analysis was added to the index above; leave it out of its own comparison
+        peers = get_peer_index().ranks(
+            country, family_size, location_type, analysis['savings_ratio'], expenses, analysis['total_income'],
+            exclude_own=True
+        )
+        if peers is not None:
+            st.subheader("👥 Households Like Yours")
+            segment = f"{country}, family of {family_size}, {location_type.lower()}"
+            if peers['peers'] < MIN_PEERS:
+                st.caption(f"Not enough other households like yours on this server yet ({segment}: {peers['peers']})")
             else:
-                st.info("Enter your income and expenses to get personalized recommendations")
+                lines = [f"- Savings rate: higher than **{peers['savings_ratio']:.0f}%** of them"]
+                lines += [
+                    f"- {category}: spends a larger share of income than **{percentile:.0f}%** of them"
+                    for category, percentile in peers['shares'].items() if expenses.get(category, 0) > 0
+                ]
+                st.markdown("\n".join(lines))
+                st.caption(
+                    f"Compared with {peers['peers']:,} other analyses from households like yours ({segment}) "
+                    "made on this server since it last started"
+                )
+
+        # Target budget, solved only when asked for
+        if analysis['total_expenses'] > 0 and st.toggle("🎯 Suggest a target budget", key="show_optimizer"):
+            default_goal = int(round(ai_advisor.savings_targets[ai_advisor.country_codes.get(country, -1)] * 100))
+            goal = st.slider("Savings goal (% of income)", 0, 50, default_goal, key="savings_goal")
+            plan = ai_advisor.optimize_budget(income, expenses, country, savings_goal=goal / 100)
+            st.dataframe([
+                {'Category': category, 'Now': expenses.get(category, 0), 'Target': round(target),
+                 'Change': round(plan['changes'][category])}
+                for category, target in plan['expenses'].items() if expenses.get(category, 0) or target
+            ], hide_index=True)
+            if plan['feasible']:
+                # Over-cap categories come down even when the goal is already met
+                steps = []
+                if plan['capped']:
+                    steps.append(f"bringing {', '.join(plan['capped'])} down to the recommended share of income")
+                if plan['even_cut']:
+                    steps.append("making the smallest even cut across categories that reaches the goal")
+                how = f"by {' and '.join(steps)}" if steps else "as it is; the goal is already met"
+                st.caption(f"Saves {currency_symbol}{plan['savings']:,.0f} ({plan['savings_ratio']:.0%}) {how}")
+            else:
+                st.warning(f"The goal is out of reach by {currency_symbol}{plan['shortfall']:,.0f} a month")
+
+        # Financial Health Score with progress bar
+        if analysis['total_income'] > 0:
+            st.subheader("🏥 Financial Health Score")
+            health_score = min(100, max(0, int(analysis['savings_ratio'] * 200)))
             
-            # Financial Health Score with progress bar
-            if analysis['total_income'] > 0:
-                st.subheader("🏥 Financial Health Score")
-                health_score = min(100, max(0, int(analysis['savings_ratio'] * 200)))
-                
-                st.markdown(f"""
-                <div class="progress-container">
-                    <div class="progress-fill" style="width: {health_score}%"></div>
-                </div>
-                <p style="text-align: center; font-weight: bold; margin-top: 0.5rem;">{health_score}/100</p>
-                """, unsafe_allow_html=True)
-                
-                if health_score >= 70:
-                    st.success("👍 Excellent Financial Health - You're doing great!")
-                elif health_score >= 40:
-                    st.warning("⚠️ Fair - There's room for improvement")
-                else:
-                    st.error("🚨 Needs Attention - Let's work on improving your financial health")
+            st.markdown(f"""
+            <div class="progress-container">
+                <div class="progress-fill" style="width: {health_score}%"></div>
+            </div>
+            <p style="text-align: center; font-weight: bold; margin-top: 0.5rem;">{health_score}/100</p>
+            """, unsafe_allow_html=True)
             
-            # Display additional sections
-            display_statistics(st.session_state.user_stats)
-            display_learning_resources(ai_advisor)
+            if health_score >= 70:
+                st.success("👍 Excellent Financial Health - You're doing great!")
+            elif health_score >= 40:
+                st.warning("⚠️ Fair - There's room for improvement")
+            else:
+                st.error("🚨 Needs Attention - Let's work on improving your financial health")
+        
+        # Re-entering the latest month replaces it; earlier months can't be inserted
+        history = session.budget_history
+        if history.latest_month is None or month_index(month) >= history.latest_month:
+            history.record(month, analysis['total_income'], expenses)
+        else:
+            st.caption("Budget trends take months in order, so this earlier month was not added to them")
+        display_budget_trends(history)
+        
+        # Savings projection, simulated only when asked for
+        if analysis['total_income'] > 0 and st.toggle("🔮 Show savings projection", key="show_projection"):
+            years = st.slider("Projection horizon (years)", 1, 10, 5, key="projection_years")
+            projection, fig_projection = savings_projection(
+                analysis['total_income'], analysis['total_expenses'], years, currency_symbol
+            )
+            st.plotly_chart(fig_projection, use_container_width=True)
+            median = projection['percentiles'][50][-1]
+            st.caption(
+                f"Median balance after {years} years: {currency_symbol}{median:,.0f} • "
+                f"Chance of ending below zero: {projection['probability_negative']:.0%} • "
+                "Assumes 10% income and 5% expense volatility and 3% yearly inflation"
+            )
+        
+    except Exception as e:
+        st.error("❌ An error occurred during analysis. Please check your inputs and try again.")
+        st.info("💡 Make sure you've entered valid numbers for income and expenses.")
+
+@st.fragment(run_every=STATS_REFRESH_SECONDS)
+def display_live_statistics(user_stats):
+    """Community statistics, refreshed on their own schedule"""
+    display_statistics(user_stats)
+
+def display_debug_panel(trace):
+    """Per-session timings of this run plus process-wide span totals (?debug=1)"""
+    with st.sidebar.expander("🛠️ Debug timings"):
+        st.caption("This run")
+        st.dataframe([{'span': name, 'ms': seconds * 1000} for name, seconds in trace], hide_index=True)
+        st.caption("Process totals")
+        st.json(metrics.snapshot(), expanded=False)
+
+def render_page():
+    # Main header with animations
+    st.markdown('<h1 class="main-header">💰 BudgetBuddy AI</h1>', unsafe_allow_html=True)
+    st.markdown('<div class="sub-header">Smart Financial Planning for Everyone</div>', unsafe_allow_html=True)
+    
+    # Initialize systems
+    ai_advisor = get_advisor()
+    initialize_session_state()
+    
+    # Show hero section and features when no analysis is done
+    if not st.session_state.analyze:
+        display_hero_section()
+        display_features()
+        
+        # Quick start CTA
+        st.markdown("---")
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.markdown("""
+            <div style="text-align: center;">
+                <h3>Ready to Transform Your Finances?</h3>
+                <p>Get started with our AI-powered budget analysis in just a few clicks!</p>
+            </div>
+            """, unsafe_allow_html=True)
             
-        except Exception as e:
-            st.error("❌ An error occurred during analysis. Please check your inputs and try again.")
-            st.info("💡 Make sure you've entered valid numbers for income and expenses.")
+            # This button should work now
+            if st.button("🚀 Start Your Analysis Now", use_container_width=True, type="primary"):
+                st.session_state.analyze = True
+                st.rerun()
+        
+        # Show learning resources on homepage
+        display_learning_resources(ai_advisor)
+    
+    # Sidebar - Always visible and enhanced
+    with st.sidebar:
+        country, family_size, location_type, month, income, expenses = display_sidebar(ai_advisor)
+    
+    # Main content when analysis is done
+    if st.session_state.analyze:
+        display_analysis(
+            ai_advisor, income, expenses,
+            st.session_state.country, family_size, location_type, month,
+            ai_advisor.get_currency_symbol(country)
+        )
+        display_live_statistics(get_user_statistics())
+        display_learning_resources(ai_advisor)
+
+def main():
+    start_metrics_exporters()
+    metrics.increment('reruns_total')
+    with metrics.trace() as trace, metrics.span('render_page'):
+        render_page()
+    if METRICS_ENABLED and st.query_params.get('debug') == '1':
+        display_debug_panel(trace)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,57 @@
+"""Throughput of AIBudgetAdvisor.analyze_batch versus the per-record loop.
+
+Usage: python benchmarks/bench_batch.py [rows ...]   (default: 1000 100000 10000000)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from budgetbuddy import AIBudgetAdvisor  # noqa: E402
+from budgetbuddy.poverty import LOCATIONS  # noqa: E402
+
+
+def make_households(advisor, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    countries = np.array(list(advisor.country_data.keys()), dtype=object)
+    data = {
+        'country': countries[rng.integers(0, len(countries), rows)],
+        'family_size': rng.integers(1, 11, rows),
+        'location_type': np.array(LOCATIONS, dtype=object)[rng.integers(0, len(LOCATIONS), rows)],
+    }
+    for category in advisor.income_categories:
+        data[f"inc_{category}"] = rng.integers(0, 20000, rows) * (rng.random(rows) < 0.4)
+    for category in advisor.expense_categories:
+        data[f"exp_{category}"] = rng.integers(0, 5000, rows)
+    return pd.DataFrame(data)
+
+
+def loop_analyze(advisor, df):
+    for row in df.to_dict('records'):
+        income = {c: row[f"inc_{c}"] for c in advisor.income_categories}
+        expenses = {c: row[f"exp_{c}"] for c in advisor.expense_categories}
+        advisor.analyze_spending_patterns(income, expenses, row['country'], row['family_size'],
+                                          row['location_type'])
+
+
+def main(sizes):
+    advisor = AIBudgetAdvisor()
+    print(f"{'rows':>10} {'batch (s)':>10} {'rows/s':>14} {'loop rows/s':>14}")
+    for rows in sizes:
+        df = make_households(advisor, rows)
+        start = time.perf_counter()
+        advisor.analyze_batch(df)
+        batch_time = time.perf_counter() - start
+        # The scalar loop is only timed on a sample to keep large runs bounded
+        sample = df.head(min(rows, 100_000))
+        start = time.perf_counter()
+        loop_analyze(advisor, sample)
+        loop_rate = len(sample) / (time.perf_counter() - start)
+        print(f"{rows:>10} {batch_time:>10.3f} {rows / batch_time:>14,.0f} {loop_rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 10_000_000])
@@ -0,0 +1,63 @@
+"""Server render time and payload of the analysis/statistics charts per rerun.
+
+Compares the old behaviour (every chart rebuilt and sent on every rerun) with
+memoized figures and the health chart hidden behind its toggle. "Render" is
+figure construction plus the to_dict/to_json work st.plotly_chart does.
+
+Usage: python benchmarks/bench_figures.py [reruns]   (default: 200)
+"""
+from functools import lru_cache
+import os
+import sys
+import time
+
+import plotly.io as pio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from budgetbuddy import charts  # noqa: E402
+
+INCOME, EXPENSES, SYMBOL = 10000, 7500, '₹'
+EXPENSE_ITEMS = (('Food', 3000), ('Housing', 2500), ('Transport', 1200), ('Utilities', 800))
+HEALTH_ITEMS = (('Good', 120), ('Needs Improvement', 80))
+
+
+def serialize(fig):
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+def eager_rerun():
+    return [
+        serialize(charts.income_expense_figure(INCOME, EXPENSES, SYMBOL)),
+        serialize(charts.expense_figure(EXPENSE_ITEMS, SYMBOL)),
+        serialize(charts.health_figure(HEALTH_ITEMS)),
+    ]
+
+
+income_expense_figure = lru_cache(maxsize=1024)(charts.income_expense_figure)
+expense_figure = lru_cache(maxsize=1024)(charts.expense_figure)
+
+
+def cached_rerun():
+    return [
+        serialize(income_expense_figure(INCOME, EXPENSES, SYMBOL)),
+        serialize(expense_figure(EXPENSE_ITEMS, SYMBOL)),
+    ]
+
+
+def measure(rerun, reruns):
+    payload = sum(len(spec.encode('utf-8')) for spec in rerun())
+    start = time.perf_counter()
+    for _ in range(reruns):
+        rerun()
+    return (time.perf_counter() - start) / reruns * 1000, payload
+
+
+def main(reruns):
+    print(f"{'mode':>8} {'render (ms)':>12} {'payload (bytes)':>16}")
+    for name, rerun in (('eager', eager_rerun), ('cached', cached_rerun)):
+        ms, payload = measure(rerun, reruns)
+        print(f"{name:>8} {ms:>12.2f} {payload:>16,}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,48 @@
+"""Caller-side latency of add_user_data with direct vs queued SQLite writes.
+
+Direct writes commit one transaction per record on the calling thread; the
+IngestQueue only enqueues and commits in batches from its writer thread.
+
+Usage: python benchmarks/bench_ingest.py [records]   (default: 20000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from budgetbuddy.ingest import IngestQueue  # noqa: E402
+from budgetbuddy.stats import SQLiteStatsStore, UserStatistics  # noqa: E402
+
+
+def run(user_stats, n):
+    latencies = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        user_stats.add_user_data('India', 6000 + i, 0.2, 'Good')
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"{'mode':>8} {'p50 (us)':>10} {'p99 (us)':>10} {'total (s)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        direct = UserStatistics(SQLiteStatsStore(os.path.join(tmp, 'direct.db')))
+        ingest = IngestQueue(SQLiteStatsStore(os.path.join(tmp, 'queued.db')))
+        queued = UserStatistics(ingest)
+        for name, user_stats in (('direct', direct), ('queued', queued)):
+            start = time.perf_counter()
+            latencies = run(user_stats, n)
+            if user_stats is queued:
+                ingest.close()
+            total = time.perf_counter() - start
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+            print(f"{name:>8} {p50:10.1f} {p99:10.1f} {total:10.2f}")
+        print(f"queued batches: {ingest.stats()['batches']}")
+
+
+if __name__ == '__main__':
+    main()
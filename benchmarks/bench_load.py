@@ -0,0 +1,122 @@
+"""Headless load test of app.py: N concurrent sessions scripting the main flows.
+
+Each session is a Streamlit AppTest driven from its own thread through
+analyze -> view statistics -> new analysis (clear) -> analyze -> home, with
+different inputs per session. All sessions share one process, so the
+st.cache_resource objects (advisor, stats store, caches) are shared exactly as
+on a server node. AppTest can only execute one script run per process at a
+time, so runs are serialized by a lock; since script runs hold the GIL anyway
+this matches a single server process, and the reported latency includes the
+time a session waits for the others. Reports per-action p50/p99 latency,
+throughput and resident memory per session.
+
+Usage: python benchmarks/bench_load.py [--sessions N] [--iterations N]
+                                      [--save PATH] [--compare PATH] [--tolerance F]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+import results  # noqa: E402
+
+APP = os.path.join(os.path.dirname(__file__), '..', 'app.py')
+
+
+def rss_mb():
+    """Resident set size of this process in MB (Linux /proc, else peak RSS)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def click(at, label):
+    next(b for b in at.button if label in b.label).click().run()
+
+
+def analyze(at, salary, food):
+    at.number_input(key='inc_Salary').set_value(salary)
+    at.number_input(key='exp_Food').set_value(food)
+    click(at, 'Analyze')
+
+
+FLOW = (
+    ('analyze', lambda at, i: analyze(at, 5000 + 37 * i, 2000 + 11 * i)),
+    ('view_statistics', lambda at, i: click(at, 'View Statistics')),
+    ('new_analysis', lambda at, i: click(at, 'New Analysis')),
+    ('reanalyze', lambda at, i: analyze(at, 6000 + 37 * i, 2500 + 11 * i)),
+    ('home', lambda at, i: click(at, 'Home')),
+)
+
+
+def run_session(at, session, iterations, timings, errors, lock):
+    try:
+        for iteration in range(iterations):
+            for action, step in FLOW:
+                start = time.perf_counter()
+                with lock:
+                    step(at, session * iterations + iteration)
+                timings[action].append(time.perf_counter() - start)
+                if at.exception:
+                    raise RuntimeError(f"{action}: {at.exception[0].value}")
+    except Exception as e:
+        errors.append(f"session {session}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=5)
+    results.add_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault('BUDGETBUDDY_STATS_DB', os.path.join(tmp, 'stats.db'))
+        from streamlit.testing.v1 import AppTest
+
+        # Warm the process-wide caches so the first session does not pay for them
+        AppTest.from_file(APP, default_timeout=60).run()
+        baseline_mb = rss_mb()
+        sessions = [AppTest.from_file(APP, default_timeout=60).run() for _ in range(args.sessions)]
+
+        timings = {action: [] for action, _ in FLOW}
+        errors = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=run_session, args=(at, i, args.iterations, timings, errors, lock))
+            for i, at in enumerate(sessions)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        memory_per_session = (rss_mb() - baseline_mb) / args.sessions
+
+    if errors:
+        print('\n'.join(errors), file=sys.stderr)
+        return 1
+
+    actions = sum(len(t) for t in timings.values())
+    measured = {action: results.summarize(t) for action, t in timings.items()}
+    measured['all_actions'] = dict(
+        results.summarize(np.concatenate([np.asarray(t) for t in timings.values()])),
+        throughput_per_s=actions / elapsed,
+        memory_per_session_mb=memory_per_session,
+    )
+    print(f"{args.sessions} sessions x {args.iterations} iterations: {actions} reruns in {elapsed:.1f}s")
+    return results.report(args, 'load', measured)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Per-call latency of the hot paths behind one page render.
+
+Times single calls of analyze_spending_patterns, optimize_budget, the analysis
+cache key, a peer percentile lookup, get_statistics / get_window_statistics on
+each stats store, and every chart builder, and reports p50/p99 per case. Save a
+run and compare later runs against it to catch regressions:
+
+Usage: python benchmarks/bench_micro.py [--repeat N] [--save PATH] [--compare PATH] [--tolerance F]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import results  # noqa: E402
+from budgetbuddy import (  # noqa: E402
+    AIBudgetAdvisor, AnalysisCache, PeerIndex, RingBufferStatsStore, SketchStatsStore, SQLiteStatsStore, UserStatistics
+)
+from budgetbuddy import charts  # noqa: E402
+from budgetbuddy.projection import project_savings  # noqa: E402
+
+INCOME = {'Salary': 8000, 'Business': 0, 'Agriculture': 0, 'Daily Wage': 1500, 'Other': 500}
+EXPENSES = {'Food': 3000, 'Housing': 2500, 'Transport': 1200, 'Healthcare': 300,
+            'Education': 400, 'Utilities': 800, 'Other': 200}
+
+
+def time_calls(fn, repeat):
+    fn()  # warm-up
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return results.summarize(timings, unit='us')
+
+
+def fill(user_stats, n, seed=0):
+    rng = np.random.default_rng(seed)
+    countries = rng.choice(['India', 'United States', 'Japan', 'Kenya', 'Nigeria'], n).tolist()
+    ratios = rng.normal(0.1, 0.3, n).tolist()
+    for country, ratio in zip(countries, ratios):
+        user_stats.add_user_data(country, 10000, ratio, 'Good' if ratio >= 0.1 else 'Needs Improvement')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--records', type=int, default=10_000, help='Records in each stats store')
+    results.add_arguments(parser)
+    args = parser.parse_args()
+
+    advisor = AIBudgetAdvisor()
+    analysis = advisor.analyze_spending_patterns(INCOME, EXPENSES, 'India', 4)
+    expense_items = tuple((k, v) for k, v in EXPENSES.items() if v > 0)
+    projection = project_savings(sum(INCOME.values()), sum(EXPENSES.values()))
+    cases = {
+        'analyze_spending_patterns': lambda: advisor.analyze_spending_patterns(INCOME, EXPENSES, 'India', 4),
+        'optimize_budget': lambda: advisor.optimize_budget(INCOME, EXPENSES, 'India', savings_goal=0.2),
+        'analysis_cache_key': lambda: AnalysisCache.make_key(INCOME, EXPENSES, 'India', 4),
+        'income_expense_figure': lambda: charts.income_expense_figure(
+            analysis['total_income'], analysis['total_expenses'], '₹'),
+        'expense_figure': lambda: charts.expense_figure(expense_items, '₹'),
+        'health_figure': lambda: charts.health_figure((('Good', 120), ('Needs Improvement', 80))),
+        'projection_figure': lambda: charts.projection_figure(projection, '₹'),
+    }
+
+    peers = PeerIndex(advisor.expense_categories)
+    rng = np.random.default_rng(0)
+    for ratio in rng.normal(0.1, 0.3, args.records).tolist():
+        peers.add('India', 4, 'Urban', ratio, EXPENSES, sum(INCOME.values()))
+    cases['peer_ranks'] = lambda: peers.ranks(
+        'India', 4, 'Urban', analysis['savings_ratio'], EXPENSES, analysis['total_income'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            'ring': RingBufferStatsStore(),
+            'sqlite': SQLiteStatsStore(os.path.join(tmp, 'stats.db'), advisor.currencies),
+            'sketch': SketchStatsStore(),
+        }
+        for name, store in stores.items():
+            user_stats = UserStatistics(store, advisor.currencies)
+            fill(user_stats, args.records)
+            cases[f'get_statistics[{name}]'] = user_stats.get_statistics
+            cases[f'get_window_statistics[{name}]'] = lambda u=user_stats: u.get_window_statistics('day')
+
+        measured = {}
+        for case, fn in cases.items():
+            # Figure builders are ~1000x slower than the rest; keep the run short
+            repeat = args.repeat // 20 if case.endswith('figure') else args.repeat
+            measured[case] = time_calls(fn, max(repeat, 10))
+        stores['sqlite'].conn.close()
+
+    return results.report(args, 'micro', measured)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Throughput of AIBudgetAdvisor.optimize_batch versus the per-household loop.
+
+Every household gets a 20% savings goal and a Housing minimum of 1000, so
+most rows need cuts and some are infeasible.
+
+Usage: python benchmarks/bench_optimizer.py [rows ...]   (default: 1000 100000 1000000)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_batch import make_households  # noqa: E402
+from budgetbuddy import AIBudgetAdvisor  # noqa: E402
+
+GOAL = 0.2
+MINIMUMS = {'Housing': 1000}
+
+
+def loop_optimize(advisor, df):
+    for row in df.to_dict('records'):
+        income = {c: row[f"inc_{c}"] for c in advisor.income_categories}
+        expenses = {c: row[f"exp_{c}"] for c in advisor.expense_categories}
+        advisor.optimize_budget(income, expenses, row['country'], savings_goal=GOAL, minimums=MINIMUMS)
+
+
+def main(sizes):
+    advisor = AIBudgetAdvisor()
+    print(f"{'rows':>10} {'batch (s)':>10} {'rows/s':>14} {'loop rows/s':>14} {'feasible':>10}")
+    for rows in sizes:
+        df = make_households(advisor, rows)
+        start = time.perf_counter()
+        result = advisor.optimize_batch(df, savings_goal=GOAL, minimums=MINIMUMS)
+        batch_time = time.perf_counter() - start
+        # The scalar loop is only timed on a sample to keep large runs bounded
+        sample = df.head(min(rows, 10_000))
+        start = time.perf_counter()
+        loop_optimize(advisor, sample)
+        loop_rate = len(sample) / (time.perf_counter() - start)
+        print(f"{rows:>10} {batch_time:>10.3f} {rows / batch_time:>14,.0f} {loop_rate:>14,.0f} "
+              f"{result['feasible'].mean():>10.1%}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 1_000_000])
@@ -0,0 +1,45 @@
+"""Speedup of budgetbuddy.score_dataframe across worker counts.
+
+Usage: python benchmarks/bench_parallel.py [--rows N] [--chunk-size N]
+                                          [--partition rows|country] [--workers 1 2 4 ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_batch import make_households  # noqa: E402
+from budgetbuddy import AIBudgetAdvisor, score_dataframe  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--partition', choices=['rows', 'country'], default='rows')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    df = make_households(AIBudgetAdvisor(), args.rows)
+    print(f"{args.rows} rows, chunk size {args.chunk_size}, partition by {args.partition}, "
+          f"{os.cpu_count()} cores")
+    print(f"{'workers':>8} {'time (s)':>9} {'rows/s':>12} {'speedup':>8}")
+    baseline = reference = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        scored, aggregates = score_dataframe(df, workers=workers, chunk_size=args.chunk_size,
+                                             partition=args.partition)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        stats = aggregates.get_statistics()
+        # Results must not depend on the worker count
+        reference = reference or stats
+        assert stats == reference and scored.index.equals(df.index)
+        print(f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
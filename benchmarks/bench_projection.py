@@ -0,0 +1,25 @@
+"""Run time of the Monte Carlo savings projection.
+
+Usage: python benchmarks/bench_projection.py [paths]   (default: 10000)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from budgetbuddy.projection import project_savings  # noqa: E402
+
+
+def main(paths):
+    print(f"{'years':>6} {'paths':>8} {'time (ms)':>10}")
+    for years in (1, 5, 10):
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            project_savings(10_000, 8_000, years=years, paths=paths)
+            best = min(best, time.perf_counter() - start)
+        print(f"{years:>6} {paths:>8} {best * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
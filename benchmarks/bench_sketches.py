@@ -0,0 +1,58 @@
+"""Memory, throughput and accuracy of the sketch-backed community statistics.
+
+Streams synthetic records with a long tail of countries into StatsSketch, one
+record at a time and in batches, and compares the result against exact
+aggregates computed with NumPy.
+
+Usage: python benchmarks/bench_sketches.py [records]   (default: 1000000)
+"""
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from budgetbuddy.sketches import PERCENTILES, StatsSketch  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    countries = np.char.add('country-', (rng.zipf(1.3, n) % 5000).astype(str)).astype(object)
+    ratios = rng.normal(0.1, 0.3, n)
+    health = np.where(ratios >= 0.1, 'Good', 'Needs Improvement')
+
+    single = StatsSketch()
+    m = min(n, 100_000)
+    start = time.perf_counter()
+    for country, ratio, h in zip(countries[:m].tolist(), ratios[:m].tolist(), health[:m].tolist()):
+        single.add(country, ratio, h)
+    elapsed = time.perf_counter() - start
+    print(f"add:      {m / elapsed:12,.0f} records/s")
+
+    # Four "workers" sketch a quarter each, then merge
+    start = time.perf_counter()
+    merged = StatsSketch()
+    for part in np.array_split(np.arange(n), 4):
+        worker = StatsSketch()
+        worker.add_many(countries[part], ratios[part], health[part])
+        merged.merge(worker)
+    stats = merged.get_statistics()
+    elapsed = time.perf_counter() - start
+    print(f"add_many: {n / elapsed:12,.0f} records/s (4 merged partitions)")
+    print(f"size:     {len(pickle.dumps(merged)):12,d} bytes pickled")
+
+    unique, counts = np.unique(countries.astype(str), return_counts=True)
+    print(f"distinct countries: {stats['countries_represented']:,} (exact {len(unique):,})")
+    exact_top = sorted(zip(unique.tolist(), counts.tolist()), key=lambda pair: -pair[1])[:5]
+    print(f"top countries:      {list(stats['top_countries'].items())}")
+    print(f"exact top:          {exact_top}")
+    exact = np.percentile(ratios, PERCENTILES)
+    for p, value in zip(PERCENTILES, exact):
+        print(f"p{p:<3d} savings ratio: {stats['savings_ratio_percentiles'][p]:+.4f} (exact {value:+.4f})")
+
+
+if __name__ == '__main__':
+    main()
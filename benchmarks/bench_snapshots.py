@@ -0,0 +1,84 @@
+"""Open and aggregate cost of stats snapshots: memory-mapped Arrow IPC versus Parquet.
+
+Writes a synthetic snapshot of N records in each format, then in a fresh
+interpreter per measurement times open_snapshot, aggregate_snapshot, and the
+RSS growth of opening, which for Arrow IPC stays near zero as the file is
+mapped rather than read. The first aggregation of a mapped file includes
+paging it in; Parquet pays for decoding at open instead.
+
+Usage: python benchmarks/bench_snapshots.py [--records N] [--save PATH] [--compare PATH] [--tolerance F]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import results  # noqa: E402
+from budgetbuddy.snapshots import BATCH_SIZE, _record_batch, record_schema, write_snapshot  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MEASURE = """
+import json, sys, time
+sys.path.insert(0, 'benchmarks')
+from bench_load import rss_mb
+from budgetbuddy.snapshots import aggregate_snapshot, open_snapshot, require_pyarrow
+require_pyarrow()
+before = rss_mb()
+start = time.perf_counter()
+table = open_snapshot(sys.argv[1])
+opened = time.perf_counter() - start
+rss = rss_mb() - before
+start = time.perf_counter()
+aggregate_snapshot(table).get_statistics()
+print(json.dumps({'open': opened, 'aggregate': time.perf_counter() - start, 'rss': rss}))
+"""
+
+
+def synthetic_batches(records, seed=0):
+    rng = np.random.default_rng(seed)
+    schema = record_schema()
+    countries = ['India', 'United States', 'Japan', 'Kenya', 'Nigeria']
+    health_levels = ['Good', 'Needs Improvement']
+    for start in range(0, records, BATCH_SIZE):
+        n = min(BATCH_SIZE, records - start)
+        ratio = rng.normal(0.1, 0.3, n)
+        yield _record_batch(
+            schema, rng.integers(0, len(countries), n), countries, rng.uniform(0, 50000, n),
+            rng.uniform(0, 2000, n), ratio, (ratio < 0.1).astype(np.int8), health_levels,
+            1_700_000_000 + np.arange(start, start + n), rng.integers(0, 5, n)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=10_000_000)
+    parser.add_argument('--runs', type=int, default=3)
+    results.add_arguments(parser)
+    args = parser.parse_args()
+
+    measured = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ('arrow', 'parquet'):
+            path = os.path.join(tmp, f'stats.{ext}')
+            write_snapshot(synthetic_batches(args.records), path)
+            runs = [
+                json.loads(subprocess.run([sys.executable, '-c', MEASURE, path], cwd=ROOT, check=True,
+                                          capture_output=True, text=True).stdout.strip().splitlines()[-1])
+                for _ in range(args.runs)
+            ]
+            measured[f'open[{ext}]'] = results.summarize([r['open'] for r in runs])
+            measured[f'aggregate[{ext}]'] = results.summarize([r['aggregate'] for r in runs])
+            measured[f'open[{ext}]']['rss_mb'] = float(np.median([r['rss'] for r in runs]))
+            measured[f'open[{ext}]']['file_mb'] = os.path.getsize(path) / 2**20
+    return results.report(args, 'snapshots', measured)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Soak test of per-session memory: RSS while a stream of visitors comes and goes.
+
+Drives the same objects app.py keeps per process (session registry, analysis
+recording, shared ring-buffer stats) without the UI, one short-lived visitor
+after another, each recording a few distinct analyses and then leaving. With
+--unbounded the old behaviour is simulated instead (every session's state kept
+forever, full-history sets and dict records with datetimes) for comparison.
+
+Usage: python benchmarks/bench_soak.py [--visitors N] [--idle-seconds S] [--unbounded]
+"""
+import argparse
+from collections import deque
+from datetime import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_load import rss_mb  # noqa: E402
+from budgetbuddy import AIBudgetAdvisor, AnalysisCache, RingBufferStatsStore, UserStatistics  # noqa: E402
+from budgetbuddy.history import BudgetHistory  # noqa: E402
+from budgetbuddy.sessions import RecentKeys, SessionData, SessionRegistry  # noqa: E402
+
+
+class UnboundedRegistry:
+    """Sessions that are never evicted, as with plain st.session_state"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.sessions = {}
+
+    def get(self, session_id):
+        if session_id not in self.sessions:
+            self.sessions[session_id] = self.factory()
+        return self.sessions[session_id]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--visitors', type=int, default=200_000)
+    parser.add_argument('--analyses', type=int, default=5, help='Distinct analyses per visitor')
+    parser.add_argument('--idle-seconds', type=float, default=0.5)
+    parser.add_argument('--unbounded', action='store_true')
+    args = parser.parse_args()
+
+    advisor = AIBudgetAdvisor()
+    categories = advisor.expense_categories
+    user_stats = UserStatistics(RingBufferStatsStore(), advisor.currencies)
+    if args.unbounded:
+        registry = UnboundedRegistry(lambda: SessionData(BudgetHistory(categories), set()))
+    else:
+        registry = SessionRegistry(
+            lambda: SessionData(BudgetHistory(categories, max_months=24), RecentKeys(256)),
+            idle_ttl=args.idle_seconds
+        )
+
+    legacy_records = deque(maxlen=10000)
+    print(f"{'visitors':>10} {'sessions':>10} {'rss (MB)':>10}")
+    start_mb = rss_mb()
+    report_every = max(1, args.visitors // 10)
+    for visitor in range(args.visitors):
+        session = registry.get(f"session-{visitor}")
+        for i in range(args.analyses):
+            income = {'Salary': 5000 + visitor % 1000 + i}
+            expenses = {'Food': 2000 + i}
+            key = AnalysisCache.make_key(income, expenses, 'India', 4)
+            if key not in session.recorded_analyses:
+                session.recorded_analyses.add(key)
+                if args.unbounded:
+                    # Records used to be dicts holding a datetime
+                    legacy_records.append({
+                        'country': 'India', 'income_level': income['Salary'], 'savings_ratio': 0.2,
+                        'financial_health': 'Good', 'timestamp': datetime.now()
+                    })
+                else:
+                    user_stats.add_user_data('India', income['Salary'], 0.2, 'Good')
+                session.budget_history.record(datetime.now(), income['Salary'], expenses)
+        if (visitor + 1) % report_every == 0:
+            print(f"{visitor + 1:>10,} {len(registry.sessions):>10,} {rss_mb() - start_mb:>+10.1f}")
+            # Let the idle sessions age out between reports
+            time.sleep(args.idle_seconds if not args.unbounded else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Cold-start cost of app.py: import time and first paint of the landing page.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+- import: importing the budgetbuddy modules app.py loads at startup
+- first paint: AppTest running app.py once with no input (the landing page)
+- analysis: the first rerun that shows an analysis, which loads charts
+
+and reports whether pandas / plotly.express were loaded at each point.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--save PATH] [--compare PATH] [--tolerance F]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+import results  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import budgetbuddy, budgetbuddy.history, budgetbuddy.projection, budgetbuddy.sessions, budgetbuddy.metrics
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'pandas': 'pandas' in sys.modules,
+                  'plotly_express': 'plotly.express' in sys.modules}))
+"""
+
+FIRST_PAINT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file('app.py', default_timeout=60).run()
+first_paint = time.perf_counter() - start
+loaded = {'pandas': 'pandas' in sys.modules, 'plotly_express': 'plotly.express' in sys.modules}
+at.number_input(key='inc_Salary').set_value(10000)
+at.number_input(key='exp_Food').set_value(5000)
+start = time.perf_counter()
+next(b for b in at.button if 'Analyze' in b.label).click().run()
+analysis = time.perf_counter() - start
+assert not at.exception, at.exception
+print(json.dumps({'seconds': first_paint, 'analysis_seconds': analysis, **loaded}))
+"""
+
+
+def run(code, env):
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    results.add_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, BUDGETBUDDY_STATS_DB=os.path.join(tmp, 'stats.db'))
+        imports = [run(IMPORT, env) for _ in range(args.runs)]
+        paints = [run(FIRST_PAINT, env) for _ in range(args.runs)]
+
+    measured = {
+        'import': results.summarize([r['seconds'] for r in imports]),
+        'first_paint': results.summarize([r['seconds'] for r in paints]),
+        'first_analysis': results.summarize([r['analysis_seconds'] for r in paints]),
+    }
+    for name, runs in (('import', imports), ('first paint', paints)):
+        print(f"{name}: pandas loaded={runs[0]['pandas']}, plotly.express loaded={runs[0]['plotly_express']}")
+    print()
+    return results.report(args, 'startup', measured)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
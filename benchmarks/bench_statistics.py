@@ -0,0 +1,103 @@
+"""Render cost of UserStatistics.get_statistics: full rescan vs running aggregates.
+
+Also reports memory per record: the original dict-with-datetime records
+against the columnar ring buffer.
+
+Usage: python benchmarks/bench_statistics.py [records ...]   (default: 10000 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from budgetbuddy import RingBufferStatsStore, SQLiteStatsStore, UserStatistics  # noqa: E402
+from budgetbuddy.stats import StatsRecord  # noqa: E402
+
+COUNTRIES = ['India', 'United States', 'United Kingdom', 'Nigeria', 'Kenya', 'Japan']
+
+
+def make_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    countries = rng.choice(COUNTRIES, n)
+    ratios = rng.random(n)
+    return [
+        StatsRecord(country, 1000.0, 1000.0, ratio, 'Good' if ratio >= 0.1 else 'Needs Improvement', now)
+        for country, ratio in zip(countries.tolist(), ratios.tolist())
+    ]
+
+
+def legacy_statistics(user_data):
+    """get_statistics as it was before running aggregates"""
+    df = pd.DataFrame({
+        'country': [r.country for r in user_data],
+        'savings_ratio': [r.savings_ratio for r in user_data],
+        'financial_health': [r.financial_health for r in user_data],
+    })
+    return {
+        'total_users': len(user_data),
+        'countries_represented': df['country'].nunique(),
+        'avg_savings_ratio': df['savings_ratio'].mean(),
+        'financial_health_distribution': df['financial_health'].value_counts().to_dict(),
+        'top_countries': df['country'].value_counts().head(5).to_dict()
+    }
+
+
+def dict_record_bytes(records):
+    """Bytes per record when records are dicts holding a datetime, as they used to be"""
+    tracemalloc.start()
+    legacy = [
+        {'country': r.country, 'income_level': r.income_level, 'savings_ratio': r.savings_ratio,
+         'financial_health': r.financial_health, 'timestamp': datetime.fromtimestamp(r.timestamp)}
+        for r in records
+    ]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(legacy)
+
+
+def time_call(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(sizes):
+    print(f"{'records':>10} {'rescan (ms)':>12} {'ring (ms)':>10} {'sqlite (ms)':>12} "
+          f"{'dict (B/rec)':>13} {'ring (B/rec)':>13}")
+    for n in sizes:
+        records = make_records(n)
+        ring = UserStatistics(RingBufferStatsStore(capacity=n))
+        with tempfile.TemporaryDirectory() as tmp:
+            sqlite = UserStatistics(SQLiteStatsStore(os.path.join(tmp, 'stats.db')))
+            for record in records:
+                ring.store.append(record)
+            with sqlite.store.conn:
+                sqlite.store.conn.executemany(
+                    'INSERT INTO user_stats (country, income_level, income_base, savings_ratio, financial_health, '
+                    'timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(r.country, r.income_level, r.income_base, r.savings_ratio, r.financial_health, 0.0)
+                     for r in records]
+                )
+            sqlite.get_statistics()  # first read folds in the existing table once
+            rescan = time_call(lambda: legacy_statistics(records))
+            ring_ms = time_call(ring.get_statistics, repeat=100)
+            sqlite_ms = time_call(sqlite.get_statistics, repeat=100)
+            sqlite.store.conn.close()
+        columns = ring.store.columns.columns
+        ring_bytes = sum(column.nbytes for column in columns.values()) / n
+        print(f"{n:>10} {rescan:>12.3f} {ring_ms:>10.4f} {sqlite_ms:>12.4f} "
+              f"{dict_record_bytes(records):>13.0f} {ring_bytes:>13.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000])
@@ -0,0 +1,62 @@
+"""Latency of windowed community-statistics queries over a large SQLite store.
+
+Records are spread over the last 30 days; the hourly rollup is built when the
+store is reopened, then each window/filter combination is timed.
+
+Usage: python benchmarks/bench_window_queries.py [records]   (default: 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from budgetbuddy.currency import CurrencyTable  # noqa: E402
+from budgetbuddy.stats import SQLiteStatsStore, UserStatistics, income_band  # noqa: E402
+
+COUNTRIES = ['India', 'United States', 'United Kingdom', 'Nigeria', 'Kenya', 'Japan']
+
+
+def populate(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    countries = rng.choice(COUNTRIES, n).tolist()
+    incomes = rng.integers(0, 100_000, n).tolist()
+    ratios = rng.random(n).tolist()
+    timestamps = (now - rng.random(n) * 30 * 86400).tolist()
+    currencies = CurrencyTable.load()
+    store = SQLiteStatsStore(path, currencies)
+    with store.conn:
+        store.conn.executemany(
+            'INSERT INTO user_stats (country, income_level, savings_ratio, financial_health, timestamp, income_band, '
+            'income_base) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(c, i, r, 'Good' if r >= 0.1 else 'Needs Improvement', t, income_band(c, i),
+              float(currencies.to_base(i, c)))
+             for c, i, r, t in zip(countries, incomes, ratios, timestamps)]
+        )
+        # Drop the (empty) rollup so reopening rebuilds it from the bulk-loaded rows
+        store.conn.execute('DROP TABLE user_stats_hourly')
+    store.conn.close()
+
+
+def main(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stats.db')
+        populate(path, n)
+        start = time.perf_counter()
+        stats = UserStatistics(SQLiteStatsStore(path))
+        print(f"{n:,} records, rollup built in {time.perf_counter() - start:.2f}s")
+        print(f"{'window':>6} {'filter':>16} {'users':>9} {'ms':>8}")
+        for window in ('hour', 'day', 'week'):
+            for label, kwargs in (('all', {}), ('country=India', {'country': 'India'}), ('income band 1', {'income_band': 1})):
+                start = time.perf_counter()
+                result = stats.get_window_statistics(window, **kwargs)
+                ms = (time.perf_counter() - start) * 1000
+                print(f"{window:>6} {label:>16} {result['total_users'] if result else 0:>9,} {ms:>8.2f}")
+        stats.store.conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,83 @@
+"""Shared helpers for benchmark results: percentile summaries, saving and regression checks.
+
+Saved files are JSON: {"benchmark", "created", "python", "results": {case: {metric: value}}}.
+Comparing flags every latency metric (``*_ms`` / ``*_us``) that grew by more
+than the tolerance and every throughput metric (``*_per_s``) that shrank by
+more than it.
+"""
+from datetime import datetime, timezone
+import json
+import platform
+
+import numpy as np
+
+
+def summarize(seconds, unit='ms'):
+    """p50/p99/mean of a sequence of durations in seconds, in ms or us"""
+    scale = {'ms': 1e3, 'us': 1e6}[unit]
+    values = np.asarray(seconds, dtype=np.float64) * scale
+    p50, p99 = np.percentile(values, [50, 99])
+    return {f'p50_{unit}': float(p50), f'p99_{unit}': float(p99), f'mean_{unit}': float(values.mean())}
+
+
+def print_table(results):
+    metrics = sorted({metric for values in results.values() for metric in values})
+    widths = [max(12, len(metric)) + 2 for metric in metrics]
+    print(f"{'case':<32}" + ''.join(f"{metric:>{w}}" for metric, w in zip(metrics, widths)))
+    for case, values in results.items():
+        cells = ''.join(f"{values[m]:>{w},.2f}" if m in values else ' ' * w for m, w in zip(metrics, widths))
+        print(f"{case:<32}{cells}")
+
+
+def save(path, benchmark, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'benchmark': benchmark,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(path, results, tolerance=0.2):
+    """Print changes against a saved baseline; returns the list of regressions"""
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for case, values in results.items():
+        for metric, value in values.items():
+            before = baseline.get(case, {}).get(metric)
+            if not before:
+                continue
+            change = value / before - 1
+            if metric.endswith(('_ms', '_us', '_mb')):
+                regressed = change > tolerance
+            elif metric.endswith('_per_s'):
+                regressed = change < -tolerance
+            else:
+                continue
+            print(f"{case:<32}{metric:>16} {before:>12,.2f} -> {value:>12,.2f} ({change:+.0%})"
+                  + ('  REGRESSION' if regressed else ''))
+            if regressed:
+                regressions.append((case, metric, before, value))
+    return regressions
+
+
+def add_arguments(parser):
+    parser.add_argument('--save', metavar='PATH', help='Write the results to a JSON file')
+    parser.add_argument('--compare', metavar='PATH', help='Compare against results saved with --save')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown before --compare fails (default: 0.2)')
+
+
+def report(args, benchmark, results):
+    """Print, save and compare results as requested on the command line; returns an exit code"""
+    print_table(results)
+    if args.save:
+        save(args.save, benchmark, results)
+    if args.compare:
+        print()
+        if compare(args.compare, results, args.tolerance):
+            return 1
+    return 0
@@ -0,0 +1,19 @@
+"""BudgetBuddy domain logic, importable without Streamlit"""
+from budgetbuddy.advisor import (
+    AIBudgetAdvisor, DEFAULT_CURRENCY, DEFAULT_POVERTY_LINE, POVERTY_LINES, RECOMMENDATIONS
+)
+from budgetbuddy.cache import AnalysisCache
+from budgetbuddy.ingest import IngestQueue
+from budgetbuddy.peers import PeerIndex
+from budgetbuddy.sketches import StatsSketch
+from budgetbuddy.stats import (
+    RingBufferStatsStore, SketchStatsStore, SQLiteStatsStore, StatsAggregates, UserStatistics
+)
+
+
+def __getattr__(name):
+    # Batch scoring pulls in pandas; import it only when it is asked for
+    if name == 'score_dataframe':
+        from budgetbuddy.batch import score_dataframe
+        return score_dataframe
+    raise AttributeError(f"module 'budgetbuddy' has no attribute '{name}'")
@@ -0,0 +1,5 @@
+import sys
+
+from budgetbuddy.cli import main
+
+sys.exit(main())
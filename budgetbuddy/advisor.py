@@ -0,0 +1,311 @@
+"""Budget analysis engine: reference data and the AIBudgetAdvisor"""
+import numpy as np
+
+from budgetbuddy.currency import DEFAULT_RATES_PATH, CurrencyTable
+from budgetbuddy.metrics import timed
+from budgetbuddy.optimizer import reallocate
+from budgetbuddy.poverty import DEFAULT_POVERTY_PATH, LOCATIONS, PovertyModel, load_poverty_model
+from budgetbuddy.rules import DEFAULT_RULES_PATH, RuleSet, load_rules
+
+# National monthly poverty lines of the default poverty model (reference household of 4);
+# see budgetbuddy.poverty for household size and location adjustments
+_POVERTY_MODEL = load_poverty_model()
+POVERTY_LINES = {country: entry['line'] for country, entry in _POVERTY_MODEL['countries'].items()}
+DEFAULT_POVERTY_LINE = _POVERTY_MODEL['default_line']
+DEFAULT_CURRENCY = {'currency': '$', 'currency_name': 'US Dollar', 'symbol': '$'}
+
+# Recommendation messages of the default rule set, in the order they are shown
+RECOMMENDATIONS = {rule['id']: rule['message'] for rule in load_rules()}
+
+class AIBudgetAdvisor:
+    def __init__(self, rules_path=None, rates_path=None, poverty_path=None):
+        self.income_categories = ['Salary', 'Business', 'Agriculture', 'Daily Wage', 'Other']
+        self.expense_categories = ['Food', 'Housing', 'Transport', 'Healthcare', 'Education', 'Utilities', 'Other']
+        
+        self.country_data = {
+            'India': {'currency': '₹', 'currency_name': 'Indian Rupee', 'symbol': '₹'},
+            'United States': {'currency': '$', 'currency_name': 'US Dollar', 'symbol': '$'},
+            'United Kingdom': {'currency': '£', 'currency_name': 'British Pound', 'symbol': '£'},
+            'European Union': {'currency': '€', 'currency_name': 'Euro', 'symbol': '€'},
+            'Japan': {'currency': '¥', 'currency_name': 'Japanese Yen', 'symbol': '¥'},
+            'Canada': {'currency': 'C$', 'currency_name': 'Canadian Dollar', 'symbol': 'C$'},
+            'Australia': {'currency': 'A$', 'currency_name': 'Australian Dollar', 'symbol': 'A$'},
+            'Nigeria': {'currency': '₦', 'currency_name': 'Nigerian Naira', 'symbol': '₦'},
+            'Kenya': {'currency': 'KSh', 'currency_name': 'Kenyan Shilling', 'symbol': 'KSh'},
+            'Custom': {'currency': '', 'currency_name': 'Custom Currency', 'symbol': ''}
+        }
+        
+        self.learning_resources = {
+            'beginner': [
+                {
+                    'title': 'Khan Academy - Personal Finance',
+                    'url': 'https://www.khanacademy.org/college-careers-more/personal-finance',
+                    'description': 'Free comprehensive personal finance course',
+                    'level': 'Beginner',
+                    'duration': '20 hours',
+                    'icon': '🎓'
+                },
+                {
+                    'title': 'Coursera - Financial Planning',
+                    'url': 'https://www.coursera.org/learn/financial-planning',
+                    'description': 'Professional financial planning course',
+                    'level': 'Beginner',
+                    'duration': '15 hours',
+                    'icon': '📊'
+                }
+            ],
+            'intermediate': [
+                {
+                    'title': 'edX - Personal Finance',
+                    'url': 'https://www.edx.org/learn/personal-finance',
+                    'description': 'University-level personal finance courses',
+                    'level': 'Intermediate',
+                    'duration': '30 hours',
+                    'icon': '🏫'
+                },
+                {
+                    'title': 'Udemy - Personal Finance Masterclass',
+                    'url': 'https://www.udemy.com/course/personal-finance/',
+                    'description': 'Comprehensive personal finance and budgeting',
+                    'level': 'Intermediate',
+                    'duration': '12 hours',
+                    'icon': '💡'
+                }
+            ],
+            'advanced': [
+                {
+                    'title': 'Investopedia Academy',
+                    'url': 'https://academy.investopedia.com',
+                    'description': 'Advanced investment and wealth management strategies',
+                    'level': 'Advanced',
+                    'duration': '25 hours',
+                    'icon': '💼'
+                },
+                {
+                    'title': 'MIT OpenCourseWare - Finance',
+                    'url': 'https://ocw.mit.edu/courses/finance/',
+                    'description': 'Advanced financial theory and applications',
+                    'level': 'Advanced',
+                    'duration': '40 hours',
+                    'icon': '🎯'
+                }
+            ]
+        }
+        
+        # Lookup tables precomputed once per process (see get_advisor)
+        self.country_names = list(self.country_data)
+        self.country_codes = {country: code for code, country in enumerate(self.country_names)}
+        self.currency_symbols = {country: data['currency'] for country, data in self.country_data.items()}
+        self.poverty = PovertyModel.load(poverty_path or DEFAULT_POVERTY_PATH, self.country_names)
+        self.rules = RuleSet.load(rules_path or DEFAULT_RULES_PATH, self.country_names)
+        self.currencies = CurrencyTable.load(rates_path or DEFAULT_RATES_PATH, self.country_names)
+        self.expense_caps = self.rules.expense_caps(self.expense_categories)
+        self.savings_targets = self.rules.savings_targets()
+
+    def get_currency_symbol(self, country):
+        return self.currency_symbols.get(country, DEFAULT_CURRENCY['currency'])
+    
+    def get_currency_display(self, country):
+        return self.country_data.get(country, DEFAULT_CURRENCY)
+    
+    def _metric_values(self, total_income, savings_ratio, poverty_gap, share):
+        """Rule metrics in self.rules.metrics order; share(category) gives expense shares"""
+        values = {'total_income': total_income, 'savings_ratio': savings_ratio, 'poverty_gap': poverty_gap}
+        return [
+            values[name] if name in values else share(name[len('share:'):])
+            for name in self.rules.metrics
+        ]
+    
+    @timed('analyze_spending_patterns')
+    def analyze_spending_patterns(self, income, expenses, country, family_size, location_type=None):
+        total_income = sum(income.values())
+        total_expenses = sum(expenses.values())
+        savings = total_income - total_expenses
+        
+        savings_ratio = savings / total_income if total_income > 0 else 0
+        
+        adjusted_poverty_line = self.poverty.line(country, family_size, location_type)
+        
+        def share(category):
+            # Safe division for expense ratios
+            return expenses.get(category, 0) / total_income if total_income > 0 else 0
+        
+        metric_values = np.array([self._metric_values(
+            total_income, savings_ratio, total_income - adjusted_poverty_line, share
+        )], dtype=np.float64)
+        flags = self.rules.evaluate(
+            metric_values,
+            np.array([self.country_codes.get(country, -1)]),
+            np.array([total_income != 0])
+        )
+        recommendations = self.rules.recommendations(flags[0])
+        
+        return {
+            'savings': savings,
+            'savings_ratio': savings_ratio,
+            'recommendations': recommendations,
+            'financial_health': 'Good' if savings_ratio >= 0.1 else 'Needs Improvement',
+            'poverty_line': adjusted_poverty_line,
+            'above_poverty_line': total_income >= adjusted_poverty_line,
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'total_income_base': self.currencies.to_base(total_income, country)
+        }
+    
+    @timed('analyze_batch')
+    def analyze_batch(self, data):
+        """Vectorized analyze_spending_patterns over many households.
+        
+        ``data`` is a DataFrame (or a dict of NumPy arrays) with one row per
+        household: ``country``, ``family_size``, optionally ``location_type``
+        and one column per category, named like the sidebar widgets
+        (``inc_Salary``, ``exp_Food``, ...). Missing category columns count as
+        zero; without location_type the national poverty lines are used. Returns a DataFrame with the
+        same metrics as the single-record analysis (total_income_base is total
+        income in the base currency of self.currencies) plus one boolean
+        ``rec_<id>`` column per recommendation rule.
+        """
+        # pandas is only needed for batches, so the app can start without loading it
+        import pandas as pd
+        
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        n = len(df)
+        
+        def column_sum(prefix, categories):
+            total = np.zeros(n, dtype=np.float64)
+            for category in categories:
+                column = f"{prefix}{category}"
+                if column in df:
+                    total += df[column].to_numpy(dtype=np.float64)
+            return total
+        
+        def share(category, total_income, has_income):
+            column = f"exp_{category}"
+            if column not in df:
+                return np.zeros(n, dtype=np.float64)
+            spent = df[column].to_numpy(dtype=np.float64)
+            return np.divide(spent, total_income, out=np.zeros(n), where=has_income)
+        
+        total_income = column_sum('inc_', self.income_categories)
+        total_expenses = column_sum('exp_', self.expense_categories)
+        savings = total_income - total_expenses
+        has_income = total_income > 0
+        savings_ratio = np.divide(savings, total_income, out=np.zeros(n), where=has_income)
+        
+        countries = df['country'].astype(object)
+        codes = pd.Categorical(countries, categories=self.country_names).codes
+        location_codes = (
+            pd.Categorical(df['location_type'].astype(object), categories=LOCATIONS).codes
+            if 'location_type' in df else None
+        )
+        adjusted_poverty_line = self.poverty.lines(codes, df['family_size'].to_numpy(), location_codes)
+        
+        metric_values = np.column_stack(self._metric_values(
+            total_income, savings_ratio, total_income - adjusted_poverty_line,
+            lambda category: share(category, total_income, has_income)
+        ))
+        flags = self.rules.evaluate(metric_values, codes, total_income != 0)
+        
+        result = pd.DataFrame({
+            'country': countries.to_numpy(),
+            'savings': savings,
+            'savings_ratio': savings_ratio,
+            'financial_health': np.where(savings_ratio >= 0.1, 'Good', 'Needs Improvement'),
+            'poverty_line': adjusted_poverty_line,
+            'above_poverty_line': total_income >= adjusted_poverty_line,
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'total_income_base': self.currencies.to_base_many(total_income, codes),
+        }, index=df.index)
+        for i, rule_id in enumerate(self.rules.ids):
+            result[f"rec_{rule_id}"] = flags[:, i]
+        return result
+    
+    def batch_recommendations(self, row):
+        """Recommendation messages for one row of analyze_batch output"""
+        return self.rules.recommendations([row[f"rec_{rule_id}"] for rule_id in self.rules.ids])
+    
+    def _reallocate(self, spent, total_income, codes, savings_goal, minimums):
+        """Target spending for an (n, categories) array; see optimize_budget"""
+        goal = self.savings_targets[codes] if savings_goal is None else np.broadcast_to(savings_goal, codes.shape)
+        lower = np.zeros_like(spent)
+        for category, minimum in (minimums or {}).items():
+            lower[:, self.expense_categories.index(category)] = minimum
+        caps = self.expense_caps[codes]
+        # inf * 0 would be nan for uncapped categories of households with no income
+        upper = np.minimum(spent, np.multiply(caps, total_income[:, None], out=spent.copy(), where=np.isfinite(caps)))
+        budget = total_income * (1 - goal)
+        target, feasible = reallocate(spent, budget, lower, upper)
+        shortfall = np.where(feasible, 0.0, target.sum(axis=1) - budget)
+        return target, feasible, goal, shortfall, np.maximum(upper, lower)
+    
+    @timed('optimize_budget')
+    def optimize_budget(self, income, expenses, country, savings_goal=None, minimums=None):
+        """Least-disruptive spending that reaches a savings goal.
+        
+        Every category is cut by the same fraction (as little as possible),
+        except that none goes below its minimum in ``minimums`` (category ->
+        amount) or above the share of income the recommendation rules flag.
+        savings_goal defaults to the savings ratio the rules ask for in
+        ``country``. If the minimums alone exceed the budget, the result is
+        the minimums and ``feasible`` is False, with the gap in ``shortfall``.
+        Categories over their share are brought down to it even when the goal
+        is already met; ``capped`` lists them, and ``even_cut`` tells whether
+        the goal needed a further cut on top of that.
+        """
+        total_income = np.array([sum(income.values())], dtype=np.float64)
+        spent = np.array([[expenses.get(category, 0) for category in self.expense_categories]], dtype=np.float64)
+        codes = np.array([self.country_codes.get(country, -1)])
+        target, feasible, goal, shortfall, upper = self._reallocate(
+            spent, total_income, codes, savings_goal, minimums
+        )
+        savings = float(total_income[0] - target[0].sum())
+        capped = upper[0] < spent[0]
+        return {
+            'expenses': dict(zip(self.expense_categories, target[0].tolist())),
+            'changes': dict(zip(self.expense_categories, (target[0] - spent[0]).tolist())),
+            'savings': savings,
+            'savings_ratio': savings / float(total_income[0]) if total_income[0] > 0 else 0,
+            'savings_goal': float(goal[0]),
+            'feasible': bool(feasible[0]),
+            'shortfall': float(shortfall[0]),
+            'capped': [category for category, flag in zip(self.expense_categories, capped) if flag],
+            'even_cut': bool((target[0] < upper[0] * (1 - 1e-9)).any()),
+        }
+    
+    @timed('optimize_batch')
+    def optimize_batch(self, data, savings_goal=None, minimums=None):
+        """Vectorized optimize_budget over the same input as analyze_batch.
+        
+        savings_goal may be a scalar or one value per row, and the values of
+        ``minimums`` likewise. Returns a DataFrame with one ``target_<Category>``
+        column per expense category plus target_savings, target_savings_ratio,
+        savings_goal, feasible and shortfall.
+        """
+        import pandas as pd
+        
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        n = len(df)
+        
+        def columns(prefix, categories):
+            matrix = np.zeros((n, len(categories)), dtype=np.float64)
+            for i, category in enumerate(categories):
+                if f"{prefix}{category}" in df:
+                    matrix[:, i] = df[f"{prefix}{category}"].to_numpy(dtype=np.float64)
+            return matrix
+        
+        total_income = columns('inc_', self.income_categories).sum(axis=1)
+        spent = columns('exp_', self.expense_categories)
+        codes = pd.Categorical(df['country'].astype(object), categories=self.country_names).codes
+        target, feasible, goal, shortfall, _ = self._reallocate(spent, total_income, codes, savings_goal, minimums)
+        savings = total_income - target.sum(axis=1)
+        
+        result = pd.DataFrame(
+            target, columns=[f"target_{category}" for category in self.expense_categories], index=df.index
+        )
+        result['target_savings'] = savings
+        result['target_savings_ratio'] = np.divide(savings, total_income, out=np.zeros(n), where=total_income > 0)
+        result['savings_goal'] = goal
+        result['feasible'] = feasible
+        result['shortfall'] = shortfall
+        return result
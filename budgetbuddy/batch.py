@@ -0,0 +1,128 @@
+"""Chunked and multi-process scoring of household budget tables.
+
+Partitions are scored independently (in worker processes when ``workers`` is
+greater than one) and merged back in partition order, so the scored table and
+the community aggregates are identical for any worker count.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+
+import numpy as np
+import pandas as pd
+
+from budgetbuddy.advisor import AIBudgetAdvisor
+from budgetbuddy.sketches import StatsSketch
+from budgetbuddy.stats import StatsAggregates
+
+_worker_advisor = None
+
+
+def score_chunk(advisor, chunk):
+    """Analyze one chunk; returns the input columns joined with the analysis columns"""
+    result = advisor.analyze_batch(chunk)
+    return pd.concat([chunk, result.drop(columns=[c for c in result if c in chunk])], axis=1)
+
+
+def add_to_aggregates(aggregates, scored):
+    """Fold a scored chunk into running community aggregates without per-row Python work"""
+    grouped = scored.groupby(['country', 'financial_health'], sort=False).agg(
+        n=('savings_ratio', 'size'),
+        savings_ratio_sum=('savings_ratio', 'sum'),
+        income_base_sum=('total_income_base', 'sum'),
+    )
+    for (country, financial_health), (n, savings_ratio_sum, income_base_sum) in grouped.iterrows():
+        aggregates.add(country, float(savings_ratio_sum), financial_health, int(n), float(income_base_sum))
+
+
+def add_to_sketch(sketch, scored):
+    """Fold a scored chunk into a StatsSketch; percentiles need every savings_ratio"""
+    sketch.add_many(scored['country'].to_numpy(), scored['savings_ratio'].to_numpy(),
+                    scored['financial_health'].to_numpy(), scored['total_income_base'].to_numpy())
+
+
+def _init_worker():
+    global _worker_advisor
+    _worker_advisor = AIBudgetAdvisor()
+
+
+def _new_aggregates(sketch):
+    return StatsSketch() if sketch else StatsAggregates()
+
+
+def _score_partition(chunk, sketch=False):
+    if _worker_advisor is None:
+        _init_worker()
+    scored = score_chunk(_worker_advisor, chunk)
+    aggregates = _new_aggregates(sketch)
+    (add_to_sketch if sketch else add_to_aggregates)(aggregates, scored)
+    return scored, aggregates
+
+
+def partition_positions(df, chunk_size, partition='rows'):
+    """Split df into lists of row positions, by row ranges or by country.
+
+    Country partitions come in sorted country order; countries larger than
+    chunk_size are split into several partitions.
+    """
+    if partition == 'rows':
+        positions = np.arange(len(df))
+        boundaries = []
+    elif partition == 'country':
+        codes = pd.factorize(df['country'], sort=True)[0]
+        positions = np.argsort(codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(codes[positions])) + 1
+    else:
+        raise ValueError(f"Unknown partition mode '{partition}' (expected 'rows' or 'country')")
+
+    parts = []
+    for group in np.split(positions, boundaries):
+        parts.extend(group[i:i + chunk_size] for i in range(0, len(group), chunk_size))
+    return parts
+
+
+def imap_scored(chunks, workers=None, max_in_flight=None, sketch=False):
+    """Score an iterable of chunks, yielding (scored, aggregates) in input order.
+
+    At most max_in_flight chunks (default: twice the worker count) are queued
+    at once, so streaming input keeps bounded memory. With sketch=True the
+    per-chunk aggregates are StatsSketch instances instead of StatsAggregates.
+    """
+    workers = workers or os.cpu_count() or 1
+    score = partial(_score_partition, sketch=sketch)
+    if workers == 1:
+        for chunk in chunks:
+            yield score(chunk)
+        return
+
+    max_in_flight = max_in_flight or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score, chunk))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_dataframe(df, workers=None, chunk_size=100_000, partition='rows', sketch=False):
+    """Score a whole DataFrame across processes.
+
+    Returns the scored DataFrame in the original row order and the merged
+    StatsAggregates (StatsSketch with sketch=True).
+    """
+    parts = partition_positions(df, chunk_size, partition)
+    aggregates = _new_aggregates(sketch)
+    scored_parts = []
+    for scored, part_aggregates in imap_scored((df.iloc[part] for part in parts), workers, sketch=sketch):
+        scored_parts.append(scored)
+        aggregates.merge(part_aggregates)
+
+    if not scored_parts:
+        return score_chunk(AIBudgetAdvisor(), df), aggregates
+    scored = pd.concat(scored_parts)
+    if partition != 'rows':
+        scored = scored.iloc[np.argsort(np.concatenate(parts), kind='stable')]
+    return scored, aggregates
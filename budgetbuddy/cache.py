@@ -0,0 +1,58 @@
+"""Memoization of budget analyses"""
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+
+class AnalysisCache:
+    """LRU cache with TTL for budget analyses, with hit/miss counters"""
+    
+    def __init__(self, max_entries=1024, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(income, expenses, country, family_size, location_type=None):
+        """Canonical hash of the analysis inputs; zero-valued categories are ignored"""
+        payload = {
+            'income': {k: float(v) for k, v in income.items() if v},
+            'expenses': {k: float(v) for k, v in expenses.items() if v},
+            'country': country,
+            'family_size': int(family_size),
+            'location_type': location_type
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'size': len(self.entries)
+            }
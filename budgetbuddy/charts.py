@@ -0,0 +1,78 @@
+"""Plotly figures for the analysis and statistics views.
+
+Each builder takes only hashable primitives so the app can memoize figures on
+their input data (see the st.cache_resource wrappers in app.py).
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from budgetbuddy.metrics import timed
+
+
+@timed('build_income_expense_figure')
+def income_expense_figure(total_income, total_expenses, currency_symbol):
+    """Income vs expenses bar chart"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        name='Income',
+        x=['Total'],
+        y=[total_income],
+        marker_color='#28a745'
+    ))
+    fig.add_trace(go.Bar(
+        name='Expenses',
+        x=['Total'],
+        y=[total_expenses],
+        marker_color='#dc3545'
+    ))
+    fig.update_layout(
+        title=f"Income vs Expenses ({currency_symbol})",
+        yaxis_title=f"Amount ({currency_symbol})"
+    )
+    return fig
+
+
+@timed('build_expense_figure')
+def expense_figure(expense_items, currency_symbol):
+    """Expense distribution pie from a tuple of (category, amount) pairs"""
+    return px.pie(
+        values=[amount for _, amount in expense_items],
+        names=[category for category, _ in expense_items],
+        title=f"Expense Distribution ({currency_symbol})"
+    )
+
+
+@timed('build_health_figure')
+def health_figure(health_items):
+    """Community financial health pie from a tuple of (status, count) pairs"""
+    health_data = pd.DataFrame({
+        'Health Status': [status for status, _ in health_items],
+        'Count': [count for _, count in health_items]
+    })
+    return px.pie(health_data, values='Count', names='Health Status',
+                  title='Financial Health Distribution')
+
+
+@timed('build_projection_figure')
+def projection_figure(projection, currency_symbol):
+    """Percentile bands of a project_savings result: 5-95 and 25-75 shaded, median line"""
+    months = projection['months']
+    bands = projection['percentiles']
+    fig = go.Figure()
+    for low, high, opacity in ((5, 95, 0.15), (25, 75, 0.3)):
+        fig.add_trace(go.Scatter(
+            x=months, y=bands[high], mode='lines', line_width=0,
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=months, y=bands[low], mode='lines', line_width=0, fill='tonexty',
+            fillcolor=f'rgba(102, 126, 234, {opacity})', name=f'{low}th–{high}th percentile'
+        ))
+    fig.add_trace(go.Scatter(x=months, y=bands[50], mode='lines', name='Median', line_color='#764ba2'))
+    fig.update_layout(
+        title=f"Projected Savings Balance ({currency_symbol})",
+        xaxis_title="Months from now",
+        yaxis_title=f"Balance ({currency_symbol})"
+    )
+    return fig
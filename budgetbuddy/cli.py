@@ -0,0 +1,157 @@
+"""Headless bulk scoring of household budgets.
+
+Streams a CSV, JSONL, Parquet or Arrow IPC file through
+AIBudgetAdvisor.analyze_batch in fixed-size chunks and writes the input columns
+plus the analysis columns to an output file of any of the same formats, so
+memory stays bounded by the chunk size rather than the file size. Arrow files
+are memory-mapped, so chunks are read without copying.
+
+    python -m budgetbuddy score households.csv scored.parquet --chunk-size 100000
+
+Community stats records can be exported from the app's SQLite database to an
+Arrow IPC or Parquet snapshot, and aggregated straight from a snapshot:
+
+    python -m budgetbuddy export budgetbuddy_stats.db stats.arrow
+    python -m budgetbuddy stats stats.arrow
+
+Input rows need ``country``, ``family_size`` and ``inc_<Category>`` /
+``exp_<Category>`` columns (missing categories count as zero), and may have a
+``location_type`` column (Urban, Semi-Urban or Rural).
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from budgetbuddy.batch import imap_scored
+from budgetbuddy.sketches import StatsSketch
+from budgetbuddy.snapshots import aggregate_snapshot, export_database, open_snapshot, require_pyarrow
+from budgetbuddy.stats import StatsAggregates
+
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported file type '{ext}' (expected one of {', '.join(sorted(FORMATS))})")
+    return FORMATS[ext]
+
+
+def read_chunks(path, chunk_size):
+    """Yield DataFrames of at most chunk_size rows from a CSV, JSONL, Parquet or Arrow IPC file"""
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif fmt == 'jsonl':
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size)
+    elif fmt == 'parquet':
+        pa = require_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        for batch in open_snapshot(path).to_batches(max_chunksize=chunk_size):
+            yield batch.to_pandas()
+
+
+class ChunkWriter:
+    """Append DataFrame chunks to a CSV, JSONL, Parquet or Arrow IPC file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = detect_format(path)
+        self.table_writer = None
+        self.schema = None
+        self.rows = 0
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.path, mode='w' if not self.rows else 'a', header=not self.rows, index=False)
+        elif self.format == 'jsonl':
+            lines = df.to_json(orient='records', lines=True, force_ascii=False)
+            with open(self.path, 'w' if not self.rows else 'a', encoding='utf-8') as f:
+                f.write(lines if lines.endswith('\n') else lines + '\n')
+        else:
+            pa = require_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.table_writer is None:
+                # Later chunks are cast to the first chunk's schema
+                self.schema = table.schema
+                if self.format == 'parquet':
+                    self.table_writer = pa.parquet.ParquetWriter(self.path, self.schema)
+                else:
+                    self.table_writer = pa.ipc.new_file(self.path, self.schema)
+            self.table_writer.write_table(table.cast(self.schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self.table_writer is not None:
+            self.table_writer.close()
+            self.table_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_file(input_path, output_path, chunk_size=100_000, workers=1, sketch=False):
+    """Score input_path into output_path chunk by chunk; returns community aggregates.
+    
+    With workers > 1 chunks are scored in a process pool and written in input order.
+    With sketch=True the aggregates are a bounded-memory StatsSketch that also
+    reports savings_ratio percentiles.
+    """
+    aggregates = StatsSketch() if sketch else StatsAggregates()
+    with ChunkWriter(output_path) as writer:
+        for scored, chunk_aggregates in imap_scored(read_chunks(input_path, chunk_size), workers, sketch=sketch):
+            writer.write(scored)
+            aggregates.merge(chunk_aggregates)
+    return aggregates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='budgetbuddy', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    score = commands.add_parser('score', help='Score a file of household budgets')
+    score.add_argument('input', help='CSV, JSONL, Parquet or Arrow file with one household per row')
+    score.add_argument('output', help='Output file; format is chosen by extension')
+    score.add_argument('--chunk-size', type=int, default=100_000, help='Rows per chunk (default: 100000)')
+    score.add_argument('--workers', type=int, default=1,
+                       help='Worker processes; 0 uses every core (default: 1)')
+    score.add_argument('--sketch', action='store_true',
+                       help='Approximate community stats in bounded memory, with savings ratio percentiles')
+    export = commands.add_parser('export', help='Export community stats records to Arrow IPC or Parquet')
+    export.add_argument('database', help="The app's SQLite stats database (BUDGETBUDDY_STATS_DB)")
+    export.add_argument('output', help='.arrow/.feather/.ipc or .parquet/.pq snapshot file')
+    stats = commands.add_parser('stats', help='Community statistics of an exported snapshot')
+    stats.add_argument('snapshot', help='Snapshot written by the export command')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'export':
+            rows = export_database(args.database, args.output)
+            sys.stderr.write(f"Exported {rows:,} records to {args.output}\n")
+            return 0
+        if args.command == 'stats':
+            aggregates = aggregate_snapshot(open_snapshot(args.snapshot))
+        else:
+            aggregates = score_file(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+                                    sketch=args.sketch)
+    except (ImportError, ValueError, OSError) as e:
+        parser.exit(1, f"budgetbuddy: error: {e}\n")
+    json.dump(aggregates.get_statistics(), sys.stderr, indent=2, default=float)
+    sys.stderr.write('\n')
+    return 0
@@ -0,0 +1,56 @@
+"""Currency normalization against a base currency.
+
+Market exchange rates and PPP conversion factors are read from a JSON file
+(see data/currency_rates.json) into one small float64 array per method,
+indexed by country code like the advisor's other lookup tables, so a batch of
+amounts converts with a single gather and divide.
+"""
+import json
+import os
+
+import numpy as np
+
+DEFAULT_RATES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'currency_rates.json')
+
+METHODS = ('fx', 'ppp')
+
+
+class CurrencyTable:
+    """Per-country conversion factors to the base currency"""
+
+    def __init__(self, rates, countries=None):
+        entries = rates['countries']
+        self.base = rates['base']
+        self.as_of = rates.get('as_of')
+        self.countries = list(entries if countries is None else countries)
+        self.country_codes = {country: code for code, country in enumerate(self.countries)}
+        self.currency_codes = {country: entries[country]['code'] for country in self.countries if country in entries}
+        # Indexed by country code; the extra last slot (rate 1) serves unknown (-1) codes
+        self.factors = {}
+        for method in METHODS:
+            factors = np.ones(len(self.countries) + 1, dtype=np.float64)
+            for code, country in enumerate(self.countries):
+                if country in entries:
+                    factor = entries[country][method]
+                    if not factor > 0:
+                        raise ValueError(f"Currency rate '{method}' for '{country}' must be positive")
+                    factors[code] = factor
+            self.factors[method] = factors
+
+    @classmethod
+    def load(cls, path=DEFAULT_RATES_PATH, countries=None):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), countries)
+
+    def _factors(self, method):
+        if method not in self.factors:
+            raise ValueError(f"Unknown conversion method '{method}' (expected one of {', '.join(METHODS)})")
+        return self.factors[method]
+
+    def to_base(self, amount, country, method='fx'):
+        """One amount in a country's currency, in the base currency"""
+        return amount / self._factors(method)[self.country_codes.get(country, -1)]
+
+    def to_base_many(self, amounts, codes, method='fx'):
+        """Vectorized to_base for arrays of amounts and country codes (-1 for unknown)"""
+        return np.asarray(amounts, dtype=np.float64) / self._factors(method)[codes]
@@ -0,0 +1,180 @@
+"""Monthly budget history with incrementally maintained rolling metrics.
+
+Each month is one row of a preallocated NumPy block: the month index, total
+income and expenses, and a vector of [savings_ratio, share of each expense
+category]. Windows are calendar months ending at the latest recorded month;
+months that were skipped are left out of their window's mean rather than
+counted as rows. Running window sums and counts are updated as rows arrive, so
+moving averages, category trends and month-over-month deltas cost
+O(categories) per new month however long the history grows. With max_months
+set, the oldest month is dropped once the history is full, so memory stays
+fixed as well.
+"""
+from datetime import date, datetime
+
+import numpy as np
+
+WINDOWS = (3, 6, 12)
+
+
+def month_index(month):
+    """Months since year 0 for a date/datetime, a (year, month) pair or a 'YYYY-MM' string"""
+    if isinstance(month, (date, datetime)):
+        return month.year * 12 + month.month - 1
+    if isinstance(month, str):
+        year, month = month.split('-')[:2]
+    else:
+        year, month = month
+    return int(year) * 12 + int(month) - 1
+
+
+def month_start(index):
+    """First day of the month with the given month_index"""
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class BudgetHistory:
+    """One household's monthly budgets in columnar form"""
+
+    def __init__(self, categories, capacity=12, windows=WINDOWS, max_months=None):
+        self.categories = list(categories)
+        self.windows = tuple(windows)
+        if max_months is not None and max_months < 2 * max(self.windows):
+            # Window sums subtract rows up to 2 * w months back, so those must still be here
+            raise ValueError(f"max_months must be at least {2 * max(self.windows)}")
+        self.max_months = max_months
+        self.size = 0
+        self.months = np.empty(capacity, dtype=np.int32)
+        self.income = np.empty(capacity, dtype=np.float64)
+        self.expenses = np.empty(capacity, dtype=np.float64)
+        # Column 0 is the savings ratio, then one expense share per category
+        self.values = np.empty((capacity, len(self.categories) + 1), dtype=np.float64)
+        # Running sums and row counts over the last w calendar months and over the w
+        # months before those, and the first row of each of those windows
+        self.current_sums = {w: np.zeros(len(self.categories) + 1) for w in self.windows}
+        self.previous_sums = {w: np.zeros(len(self.categories) + 1) for w in self.windows}
+        self.current_counts = dict.fromkeys(self.windows, 0)
+        self.previous_counts = dict.fromkeys(self.windows, 0)
+        self.current_start = dict.fromkeys(self.windows, 0)
+        self.previous_start = dict.fromkeys(self.windows, 0)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def latest_month(self):
+        """month_index of the most recent month, or None while empty"""
+        return int(self.months[self.size - 1]) if self.size else None
+
+    def _grow(self):
+        capacity = max(1, 2 * len(self.months))
+        if self.max_months is not None:
+            capacity = min(capacity, self.max_months)
+        for name in ('months', 'income', 'expenses', 'values'):
+            column = getattr(self, name)
+            grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def record(self, month, total_income, expenses):
+        """Add a month's budget, or replace it if it is the latest month already recorded"""
+        index = month_index(month)
+        total_expenses = sum(expenses.values())
+        row = np.empty(len(self.categories) + 1)
+        row[0] = (total_income - total_expenses) / total_income if total_income > 0 else 0
+        row[1:] = [expenses.get(c, 0) / total_income if total_income > 0 else 0 for c in self.categories]
+
+        if self.size and index == self.months[self.size - 1]:
+            # The latest month sits in every current window, so only those sums move
+            delta = row - self.values[self.size - 1]
+            for w in self.windows:
+                self.current_sums[w] += delta
+            position = self.size - 1
+        elif self.size and index < self.months[self.size - 1]:
+            raise ValueError("Budget history months must be recorded in order")
+        else:
+            if self.size == len(self.months) and self.size != self.max_months:
+                self._grow()
+            position = self.size
+            for w in self.windows:
+                self.current_sums[w] += row
+                self.current_counts[w] += 1
+                # Rows more than w months before the new one move to the previous window...
+                while self.current_start[w] < position and self.months[self.current_start[w]] <= index - w:
+                    leaving = self.values[self.current_start[w]]
+                    self.current_sums[w] -= leaving
+                    self.current_counts[w] -= 1
+                    self.previous_sums[w] += leaving
+                    self.previous_counts[w] += 1
+                    self.current_start[w] += 1
+                # ...and rows more than 2 * w months before it leave that one
+                while (self.previous_start[w] < self.current_start[w]
+                       and self.months[self.previous_start[w]] <= index - 2 * w):
+                    self.previous_sums[w] -= self.values[self.previous_start[w]]
+                    self.previous_counts[w] -= 1
+                    self.previous_start[w] += 1
+            if self.size == self.max_months:
+                self._drop_oldest()
+                position -= 1
+            self.size += 1
+
+        self.months[position] = index
+        self.income[position] = total_income
+        self.expenses[position] = total_expenses
+        self.values[position] = row
+
+    def _drop_oldest(self):
+        # Older than every window, so the running sums do not change; only the row positions shift
+        for name in ('months', 'income', 'expenses', 'values'):
+            column = getattr(self, name)
+            column[:self.size - 1] = column[1:self.size]
+        self.size -= 1
+        for w in self.windows:
+            self.current_start[w] -= 1
+            self.previous_start[w] -= 1
+    
+    def _window_means(self, w):
+        current, previous = self.current_counts[w], self.previous_counts[w]
+        current_mean = self.current_sums[w] / current if current else None
+        previous_mean = self.previous_sums[w] / previous if previous else None
+        return current_mean, previous_mean
+
+    def rolling_savings_ratio(self, w):
+        """Mean savings ratio over the months recorded in the last w calendar months"""
+        current_mean, _ = self._window_means(w)
+        return None if current_mean is None else float(current_mean[0])
+
+    def category_trends(self, w):
+        """Per category: mean expense share over the last w calendar months minus the w months before"""
+        current_mean, previous_mean = self._window_means(w)
+        if previous_mean is None:
+            return {}
+        change = current_mean[1:] - previous_mean[1:]
+        return dict(zip(self.categories, change.tolist()))
+
+    def month_over_month(self):
+        """Change from the previous recorded month to the latest one (None with fewer than two months).
+
+        The months need not be consecutive; previous_month is the first day of
+        the month the latest one is compared with.
+        """
+        if self.size < 2:
+            return None
+        last, prev = self.size - 1, self.size - 2
+        shares = self.values[last, 1:] - self.values[prev, 1:]
+        return {
+            'previous_month': month_start(int(self.months[prev])),
+            'income': float(self.income[last] - self.income[prev]),
+            'expenses': float(self.expenses[last] - self.expenses[prev]),
+            'savings_ratio': float(self.values[last, 0] - self.values[prev, 0]),
+            'expense_shares': dict(zip(self.categories, shares.tolist())),
+        }
+
+    def summary(self):
+        """Rolling savings ratios, category trends and month-over-month deltas"""
+        return {
+            'months': self.size,
+            'rolling_savings_ratio': {w: self.rolling_savings_ratio(w) for w in self.windows},
+            'category_trends': {w: self.category_trends(w) for w in self.windows},
+            'month_over_month': self.month_over_month(),
+        }
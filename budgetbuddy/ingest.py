@@ -0,0 +1,130 @@
+"""Background ingestion of community-statistics records.
+
+IngestQueue wraps any stats store: ``append`` only enqueues, and a daemon
+thread writes records to the store in batches, when a batch is full or when
+the oldest queued record has waited flush_interval seconds. The queue is
+bounded, so producers block (backpressure) rather than grow memory when the
+store falls behind, and the remaining records are drained at shutdown.
+
+Reads go straight to the store without flushing, so statistics lag appends by
+at most flush_interval plus one write, and a busy queue never stalls a read.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from budgetbuddy.metrics import metrics
+
+logger = logging.getLogger('budgetbuddy.ingest')
+
+_STOP = object()
+
+
+class _Flush:
+    """Queue marker; set once every record queued before it is written"""
+
+    __slots__ = ('done',)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class IngestQueue:
+    """Store wrapper that decouples appends from storage latency"""
+
+    def __init__(self, store, batch_size=500, flush_interval=1.0, max_pending=10000):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='budgetbuddy-ingest', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def append(self, record, timeout=None):
+        """Queue a record; blocks while the queue is full (raises queue.Full after timeout)"""
+        if self.closed:
+            raise RuntimeError("IngestQueue is closed")
+        self.queue.put(record, timeout=timeout)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)
+                batch = []
+                continue
+            if isinstance(item, _Flush) or item is _STOP:
+                self._write(batch)
+                batch = []
+                self.queue.task_done()
+                if item is _STOP:
+                    return
+                item.done.set()
+                continue
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with metrics.span('ingest_flush'):
+                self.store.append_many(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception:
+            # A failing store must not kill the writer; the batch is dropped and counted
+            logger.exception("Failed to write %d stats records", len(batch))
+            self.errors += 1
+            metrics.increment('ingest_dropped_records_total', len(batch))
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until the records queued before this call are stored; later appends don't delay it.
+
+        Returns False if timeout (seconds) ran out first.
+        """
+        if self.closed:
+            return True
+        marker = _Flush()
+        self.queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Drain the queue and stop the writer thread"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'pending': self.queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'errors': self.errors,
+        }
+
+    def get_statistics(self):
+        return self.store.get_statistics()
+
+    def query_window(self, start_hour, country=None, band=None):
+        return self.store.query_window(start_hour, country, band)
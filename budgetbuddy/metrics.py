@@ -0,0 +1,223 @@
+"""Timing spans and counters for the analysis hot path.
+
+Collection is off unless BUDGETBUDDY_METRICS=1 is set when the process starts.
+While off, ``timed`` returns the function unchanged and ``span`` returns a
+shared no-op context manager, so instrumented code pays almost nothing.
+
+When on, metrics can be exported as Prometheus text over HTTP
+(BUDGETBUDDY_METRICS_PORT, bound to BUDGETBUDDY_METRICS_HOST, 127.0.0.1 by
+default) and/or as a periodic JSON log line
+(BUDGETBUDDY_METRICS_LOG_INTERVAL, in seconds).
+"""
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import threading
+import time
+
+ENABLED = os.environ.get('BUDGETBUDDY_METRICS', '') not in ('', '0', 'false')
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+logger = logging.getLogger('budgetbuddy.metrics')
+
+_NOOP = nullcontext()
+
+
+class Timing:
+    """Count, sum, max and bucket counts of one span's durations"""
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+
+class Metrics:
+    """Process-wide registry of span timings, counters and gauge callbacks"""
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def observe(self, name, seconds):
+        with self.lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = Timing()
+            timing.observe(seconds)
+        trace = getattr(self.local, 'trace', None)
+        if trace is not None:
+            trace.append((name, seconds))
+
+    def increment(self, name, n=1):
+        if not ENABLED:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def register_gauges(self, name, callback):
+        """Report the numeric values of callback() (a dict) as gauges prefixed with name"""
+        self.gauges[name] = callback
+
+    @contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def span(self, name):
+        """Context manager timing its body under name"""
+        return self._span(name) if ENABLED else _NOOP
+
+    def timed(self, name=None):
+        """Decorator timing every call; a no-op when metrics are disabled"""
+        def decorator(fn):
+            if not ENABLED:
+                return fn
+            span_name = name or fn.__name__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(span_name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def trace(self):
+        """Collect (span, seconds) pairs recorded by this thread, e.g. one Streamlit run"""
+        trace = []
+        self.local.trace = trace
+        try:
+            yield trace
+        finally:
+            self.local.trace = None
+
+    def _gauge_values(self):
+        values = {}
+        for prefix, callback in list(self.gauges.items()):
+            for key, value in callback().items():
+                if isinstance(value, (int, float)):
+                    values[f"{prefix}_{key}"] = value
+        return values
+
+    def snapshot(self):
+        """Current metrics as a JSON-serializable dict"""
+        with self.lock:
+            spans = {
+                name: {
+                    'count': t.count,
+                    'total_seconds': t.total,
+                    'mean_ms': t.total / t.count * 1000 if t.count else 0.0,
+                    'max_ms': t.max * 1000,
+                }
+                for name, t in self.timings.items()
+            }
+            counters = dict(self.counters)
+        return {'spans': spans, 'counters': counters, 'gauges': self._gauge_values()}
+
+    def render_prometheus(self):
+        """Current metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP budgetbuddy_span_seconds Duration of instrumented stages',
+            '# TYPE budgetbuddy_span_seconds histogram',
+        ]
+        with self.lock:
+            for name, t in sorted(self.timings.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ('+Inf',), t.buckets):
+                    cumulative += n
+                    lines.append(f'budgetbuddy_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'budgetbuddy_span_seconds_sum{{span="{name}"}} {t.total}')
+                lines.append(f'budgetbuddy_span_seconds_count{{span="{name}"}} {t.count}')
+            counters = sorted(self.counters.items())
+        for name, value in counters:
+            lines.append(f'# TYPE budgetbuddy_{name} counter')
+            lines.append(f'budgetbuddy_{name} {value}')
+        for name, value in sorted(self._gauge_values().items()):
+            lines.append(f'# TYPE budgetbuddy_{name} gauge')
+            lines.append(f'budgetbuddy_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+span = metrics.span
+timed = metrics.timed
+
+
+def start_http_exporter(port, host='127.0.0.1'):
+    """Serve metrics.render_prometheus() at /metrics from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='budgetbuddy-metrics-http', daemon=True).start()
+    return server
+
+
+def start_json_logger(interval):
+    """Log metrics.snapshot() as one JSON line every interval seconds from a daemon thread"""
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            logger.info(json.dumps(metrics.snapshot(), sort_keys=True))
+
+    thread = threading.Thread(target=run, name='budgetbuddy-metrics-log', daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporters_from_env():
+    """Start the exporters configured through the environment (only when enabled)"""
+    if not ENABLED:
+        return
+    port = os.environ.get('BUDGETBUDDY_METRICS_PORT')
+    if port:
+        host = os.environ.get('BUDGETBUDDY_METRICS_HOST', '127.0.0.1')
+        try:
+            start_http_exporter(int(port), host)
+        except OSError as e:
+            # e.g. another server process on the node already holds the port
+            logger.warning("Metrics exporter not started on %s:%s: %s", host, port, e)
+    interval = os.environ.get('BUDGETBUDDY_METRICS_LOG_INTERVAL')
+    if interval:
+        start_json_logger(float(interval))
@@ -0,0 +1,63 @@
+"""Least-disruptive budget reallocation.
+
+Given current spending e, per-category bounds lo <= x <= hi and a spending
+budget B (income minus the savings goal), find the spending x closest to e in
+relative terms:
+
+    minimize  sum((x - e)**2 / e)   subject to  sum(x) <= B,  lo <= x <= hi
+
+The KKT conditions give x = clip((1 - t) * e, lo, hi) for a single cut
+fraction t in [0, 1] shared by every category, and sum(x) is monotone in t.
+t is found for all households at once by bisection on (n, categories) arrays,
+finished with one exact step on the last linear piece (falling back to the
+upper end of the bracket if that piece was not the final one).
+"""
+import numpy as np
+
+BISECTION_STEPS = 24
+
+
+def _spend(expenses, lower, upper, t):
+    return np.clip(expenses * (1 - t)[:, None], lower, upper)
+
+
+def reallocate(expenses, budget, lower=None, upper=None):
+    """Solve the reallocation for every row.
+
+    expenses, lower and upper are (n, categories) arrays, budget an (n,)
+    array. upper defaults to the current spending (never spend more) and lower
+    to zero; where lower exceeds upper, lower wins. Returns (spending, feasible)
+    where feasible is False for rows whose minimums alone exceed the budget
+    (their spending is set to the minimums).
+    """
+    expenses = np.asarray(expenses, dtype=np.float64)
+    budget = np.asarray(budget, dtype=np.float64)
+    lower = np.zeros_like(expenses) if lower is None else np.broadcast_to(lower, expenses.shape)
+    upper = expenses if upper is None else np.broadcast_to(upper, expenses.shape)
+    upper = np.maximum(upper, lower)
+
+    n = len(expenses)
+    low_t = np.zeros(n)
+    high_t = np.ones(n)
+    feasible = lower.sum(axis=1) <= budget
+    # Rows already within budget at t = 0 (after applying the bounds) need no cut
+    done = _spend(expenses, lower, upper, low_t).sum(axis=1) <= budget
+    high_t[done] = 0.0
+    for _ in range(BISECTION_STEPS if not done.all() else 0):
+        mid = (low_t + high_t) / 2
+        over = _spend(expenses, lower, upper, mid).sum(axis=1) > budget
+        low_t = np.where(over, mid, low_t)
+        high_t = np.where(over, high_t, mid)
+
+    # On the last piece sum(x) is linear in t: solve it exactly where possible
+    scaled = expenses * (1 - high_t)[:, None]
+    free = (scaled > lower) & (scaled < upper)
+    fixed = np.where(free, 0.0, np.clip(scaled, lower, upper)).sum(axis=1)
+    free_total = np.where(free, expenses, 0.0).sum(axis=1)
+    exact_t = 1 - np.divide(budget - fixed, free_total, out=np.ones(n), where=free_total > 0)
+    t = np.where(~done & (free_total > 0), np.clip(exact_t, low_t, high_t), high_t)
+    spending = _spend(expenses, lower, upper, t)
+    missed = spending.sum(axis=1) > budget + 1e-9 * np.abs(budget)
+    spending[missed] = _spend(expenses[missed], lower[missed], upper[missed], high_t[missed])
+    spending[~feasible] = lower[~feasible]
+    return spending, feasible
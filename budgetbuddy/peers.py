@@ -0,0 +1,76 @@
+"""Peer comparison: where a household falls among households like it.
+
+Peers share a segment, the (country, family_size, location_type) triple. Each
+segment keeps one TDigest per metric (savings ratio and every expense share),
+so adding an analysis is an append and a percentile lookup is a binary search
+over at most ~compression/2 centroids, however many analyses were recorded.
+"""
+import threading
+
+from budgetbuddy.sketches import TDigest
+
+
+class PeerIndex:
+    """Percentile ranks of savings ratio and expense shares per segment"""
+
+    def __init__(self, categories, compression=100):
+        self.categories = list(categories)
+        self.compression = compression
+        self.segments = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def segment(country, family_size, location_type):
+        return (country, int(family_size), location_type)
+
+    def _values(self, savings_ratio, expenses, total_income):
+        return [savings_ratio] + [expenses.get(category, 0) / total_income for category in self.categories]
+
+    def add(self, country, family_size, location_type, savings_ratio, expenses, total_income):
+        """Record one analysis; households without income have no shares and are skipped"""
+        if total_income <= 0:
+            return
+        key = self.segment(country, family_size, location_type)
+        values = self._values(savings_ratio, expenses, total_income)
+        with self.lock:
+            digests = self.segments.get(key)
+            if digests is None:
+                digests = self.segments[key] = [TDigest(self.compression) for _ in values]
+            for digest, value in zip(digests, values):
+                digest.add(value)
+
+    def ranks(self, country, family_size, location_type, savings_ratio, expenses, total_income,
+              exclude_own=False):
+        """Percentile (0-100) of each metric among the segment's analyses.
+
+        With exclude_own, the household's own analysis is already in the index
+        and is left out of both the percentiles and the peer count. Returns
+        {'peers', 'savings_ratio', 'shares': {category: percentile}}, or None
+        when there are no peers or the household has no income.
+        """
+        if total_income <= 0:
+            return None
+        key = self.segment(country, family_size, location_type)
+        values = self._values(savings_ratio, expenses, total_income)
+        with self.lock:
+            digests = self.segments.get(key)
+            if digests is None:
+                return None
+            fractions = [digest.cdf(value) for digest, value in zip(digests, values)]
+            total = digests[0].count
+        peers = int(total) - exclude_own
+        if peers < 1:
+            return None
+        if exclude_own:
+            # cdf counts the household's own value as half below it
+            fractions = [(fraction * total - 0.5) / peers for fraction in fractions]
+        percentiles = [100 * min(max(fraction, 0.0), 1.0) for fraction in fractions]
+        return {
+            'peers': peers,
+            'savings_ratio': percentiles[0],
+            'shares': dict(zip(self.categories, percentiles[1:])),
+        }
+
+    def stats(self):
+        with self.lock:
+            return {'segments': len(self.segments)}
@@ -0,0 +1,82 @@
+"""Poverty lines by country, location type and household size.
+
+National lines, an equivalence scale and location adjustments are read from a
+JSON file (see data/poverty_lines.json) and precomputed into one dense
+(country, location, household size) float64 grid, so a line for one household
+or a whole batch is an indexed read. Like the advisor's other lookup tables the
+last country and location slots are defaults for unknown (-1) codes: the
+default line, and the national line unadjusted for location.
+"""
+import json
+import os
+
+import numpy as np
+
+DEFAULT_POVERTY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'poverty_lines.json')
+
+LOCATIONS = ('Urban', 'Semi-Urban', 'Rural')
+
+
+def load_poverty_model(path=DEFAULT_POVERTY_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def equivalence_scale(sizes, scale, adults):
+    """Equivalised size of households of the given sizes (first adult counts 1.0 by default)"""
+    sizes = np.asarray(sizes, dtype=np.float64)
+    n_adults = np.minimum(sizes, adults)
+    return (scale['first_adult'] + scale['adult'] * np.maximum(n_adults - 1, 0)
+            + scale['child'] * (sizes - n_adults))
+
+
+class PovertyModel:
+    """Poverty line lookup grid indexed by country code, location code and household size"""
+
+    def __init__(self, model, countries=None):
+        entries = model['countries']
+        self.countries = list(entries if countries is None else countries)
+        self.country_codes = {country: code for code, country in enumerate(self.countries)}
+        self.location_codes = {location: code for code, location in enumerate(LOCATIONS)}
+        self.max_household_size = model['max_household_size']
+        self.national_lines = {country: entry['line'] for country, entry in entries.items()}
+        self.default_line = model['default_line']
+
+        sizes = np.arange(1, self.max_household_size + 1)
+        scale = equivalence_scale(sizes, model['equivalence_scale'], model['adults'])
+        reference = equivalence_scale(model['reference_household'], model['equivalence_scale'], model['adults'])
+        lines = np.empty(len(self.countries) + 1, dtype=np.float64)
+        adjustments = np.ones((len(self.countries) + 1, len(LOCATIONS) + 1), dtype=np.float64)
+        adjustments[:, :len(LOCATIONS)] = [model['locations'][location] for location in LOCATIONS]
+        for code, country in enumerate(self.countries + [None]):
+            entry = entries.get(country, {})
+            lines[code] = entry.get('line', self.default_line)
+            for location, factor in entry.get('locations', {}).items():
+                if location not in self.location_codes:
+                    raise ValueError(f"Poverty line for '{country}': unknown location type '{location}'")
+                adjustments[code, self.location_codes[location]] = factor
+        if not (lines > 0).all() or not (adjustments > 0).all():
+            raise ValueError("Poverty lines and location adjustments must be positive")
+        # grid[country, location, size - 1]
+        self.grid = lines[:, None, None] * adjustments[:, :, None] * (scale / reference)[None, None, :]
+
+    @classmethod
+    def load(cls, path=DEFAULT_POVERTY_PATH, countries=None):
+        return cls(load_poverty_model(path), countries)
+
+    def _size_index(self, family_size):
+        return np.clip(np.asarray(family_size, dtype=np.int64), 1, self.max_household_size) - 1
+
+    def line(self, country, family_size, location_type=None):
+        """Poverty line of one household; unknown countries and locations use the defaults"""
+        return float(self.grid[
+            self.country_codes.get(country, -1),
+            self.location_codes.get(location_type, -1),
+            self._size_index(family_size)
+        ])
+
+    def lines(self, country_codes, family_sizes, location_codes=None):
+        """Vectorized line for arrays of country codes, sizes and location codes (-1 for unknown)"""
+        if location_codes is None:
+            location_codes = -1
+        return self.grid[country_codes, location_codes, self._size_index(family_sizes)]
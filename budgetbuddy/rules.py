@@ -0,0 +1,138 @@
+"""Data-driven recommendation rules.
+
+Rules are loaded from a JSON file (see data/recommendation_rules.json) and
+compiled into a RuleSet: a per-country threshold table plus one column slice
+per comparison operator. Evaluating any number of households against any
+number of rules is then a handful of NumPy calls instead of one Python branch
+per rule.
+"""
+import json
+import os
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'recommendation_rules.json')
+
+METRICS = ('total_income', 'savings_ratio', 'poverty_gap', 'expense_share')
+
+OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+}
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """Read the list of rule dicts from a rules file"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['rules']
+
+
+def metric_name(rule):
+    """Column name of the metric a rule reads, e.g. 'savings_ratio' or 'share:Food'"""
+    if rule['metric'] == 'expense_share':
+        return f"share:{rule['category']}"
+    return rule['metric']
+
+
+class RuleSet:
+    """Recommendation rules compiled for vectorized evaluation"""
+
+    def __init__(self, rules, countries):
+        ids = [rule.get('id') for rule in rules]
+        if None in ids or len(set(ids)) != len(ids):
+            raise ValueError("Every recommendation rule needs a unique 'id'")
+        country_codes = {country: code for code, country in enumerate(countries)}
+
+        self.ids = ids
+        self.messages = [rule['message'] for rule in rules]
+        self.ops = [rule.get('op') for rule in rules]
+        self.rule_metrics = []
+        self.metrics = []
+        metric_index = []
+        # One row per country plus a last row of defaults for unknown (-1) codes
+        self.thresholds = np.empty((len(countries) + 1, len(rules)), dtype=np.float64)
+        op_indices = {op: [] for op in OPERATORS}
+        self.requires_income = np.empty(len(rules), dtype=bool)
+
+        for i, rule in enumerate(rules):
+            if rule.get('metric') not in METRICS:
+                raise ValueError(f"Rule '{rule['id']}': metric must be one of {', '.join(METRICS)}")
+            if rule['metric'] == 'expense_share' and 'category' not in rule:
+                raise ValueError(f"Rule '{rule['id']}': expense_share rules need a 'category'")
+            if rule.get('op') not in OPERATORS:
+                raise ValueError(f"Rule '{rule['id']}': op must be one of {', '.join(OPERATORS)}")
+
+            name = metric_name(rule)
+            self.rule_metrics.append(name)
+            if name not in self.metrics:
+                self.metrics.append(name)
+            metric_index.append(self.metrics.index(name))
+            op_indices[rule['op']].append(i)
+            self.requires_income[i] = rule.get('requires_income', True)
+
+            self.thresholds[:, i] = rule['threshold']
+            for country, threshold in rule.get('overrides', {}).items():
+                if country not in country_codes:
+                    raise ValueError(f"Rule '{rule['id']}': override for unknown country '{country}'")
+                self.thresholds[country_codes[country], i] = threshold
+
+        # Sort rules by operator so each comparison runs on a contiguous slice,
+        # then undo the permutation on the way out
+        order = [i for indices in op_indices.values() for i in indices]
+        self.order = np.array(order, dtype=np.intp)
+        self.metric_index = np.array(metric_index, dtype=np.intp)[self.order]
+        self.sorted_thresholds = self.thresholds[:, self.order]
+        self.income_exempt = ~self.requires_income[self.order]
+        self.op_slices = []
+        start = 0
+        for op, indices in op_indices.items():
+            if indices:
+                self.op_slices.append((OPERATORS[op], slice(start, start + len(indices))))
+                start += len(indices)
+        self.restore = np.argsort(self.order)
+
+    @classmethod
+    def load(cls, path, countries):
+        return cls(load_rules(path), countries)
+
+    def evaluate(self, metric_values, country_codes, has_income):
+        """Flags for every (household, rule) pair.
+
+        metric_values is an (n, len(self.metrics)) array in self.metrics order,
+        country_codes an (n,) int array (-1 for unknown countries) and
+        has_income an (n,) bool array. Returns an (n, len(self.ids)) bool array.
+        """
+        values = metric_values[:, self.metric_index]
+        thresholds = self.sorted_thresholds[country_codes]
+        flags = np.empty(values.shape, dtype=bool)
+        for compare, columns in self.op_slices:
+            compare(values[:, columns], thresholds[:, columns], out=flags[:, columns])
+        flags &= has_income[:, None] | self.income_exempt
+        return flags[:, self.restore]
+
+    def _bound(self, metric, ops, reduce, fallback):
+        columns = [i for i, (name, op) in enumerate(zip(self.rule_metrics, self.ops)) if name == metric and op in ops]
+        if not columns:
+            return np.full(len(self.thresholds), fallback)
+        return reduce(self.thresholds[:, columns], axis=1)
+
+    def expense_caps(self, categories):
+        """Largest expense share per category that no '>'/'>=' rule flags.
+
+        Returns a (countries + 1, len(categories)) array, inf for categories
+        without such a rule; the last row holds the defaults.
+        """
+        return np.column_stack([
+            self._bound(f"share:{category}", ('>', '>='), np.min, np.inf) for category in categories
+        ])
+
+    def savings_targets(self):
+        """Smallest savings ratio per country that no '<'/'<=' rule flags (0 without one)"""
+        return self._bound('savings_ratio', ('<', '<='), np.max, 0.0)
+
+    def recommendations(self, flags):
+        """Messages for one household's row of flags, in rule order"""
+        return [message for message, flag in zip(self.messages, flags) if flag]
@@ -0,0 +1,81 @@
+"""Bounded per-session state shared by the whole process.
+
+Streamlit keeps st.session_state alive until a session's connection is gone
+for good, and nothing in it is ever trimmed. State that grows with use (the
+analyses a session has recorded, its budget history) lives here instead, keyed
+by a session id: every session's share is capped, and sessions idle for
+longer than idle_ttl, or the least recently seen ones beyond max_sessions, are
+evicted.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class RecentKeys:
+    """Set of the most recently added keys, capped at maxlen"""
+
+    __slots__ = ('maxlen', 'keys')
+
+    def __init__(self, maxlen=256):
+        self.maxlen = maxlen
+        self.keys = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key):
+        self.keys[key] = None
+        self.keys.move_to_end(key)
+        if len(self.keys) > self.maxlen:
+            self.keys.popitem(last=False)
+
+
+class SessionData:
+    """Everything one session accumulates while it analyzes budgets"""
+
+    __slots__ = ('budget_history', 'recorded_analyses', 'last_seen')
+
+    def __init__(self, budget_history, recorded_analyses):
+        self.budget_history = budget_history
+        self.recorded_analyses = recorded_analyses
+        self.last_seen = 0.0
+
+
+class SessionRegistry:
+    """Session id -> SessionData, least recently seen first"""
+
+    def __init__(self, factory, idle_ttl=1800, max_sessions=1000):
+        self.factory = factory
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.evicted = 0
+        self.lock = threading.Lock()
+
+    def get(self, session_id, now=None):
+        """The session's data, created on first use (or again after eviction)"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self._evict(now)
+            data = self.sessions.pop(session_id, None)
+            if data is None:
+                data = self.factory()
+            data.last_seen = now
+            self.sessions[session_id] = data
+            return data
+
+    def _evict(self, now):
+        # Ordered by last_seen, so idle sessions are always at the front
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest.last_seen >= now - self.idle_ttl and len(self.sessions) < self.max_sessions:
+                break
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self):
+        return {'sessions': len(self.sessions), 'evicted': self.evicted}
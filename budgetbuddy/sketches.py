@@ -0,0 +1,254 @@
+"""Bounded-memory, mergeable sketches for community statistics at scale.
+
+- HyperLogLog: distinct counts (4 KB of registers at the default precision)
+- SpaceSaving: heavy hitters / top-k with at most k counters
+- TDigest: quantiles with at most ~compression/2 centroids
+
+Every sketch has ``merge`` so per-worker sketches can be combined, and a
+batch ``add_many`` that pre-aggregates with NumPy before touching the sketch.
+StatsSketch bundles them into community aggregates with the StatsAggregates
+interface.
+"""
+from collections import Counter
+import hashlib
+import math
+
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _hash64(value):
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HyperLogLog:
+    """Approximate distinct counter; standard error is about 1.04 / sqrt(2 ** precision)"""
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, value):
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        rank = remaining_bits - (h & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add_many(self, values):
+        for value in np.unique(np.asarray(values, dtype=object).astype(str)):
+            self.add(value)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class SpaceSaving:
+    """Top-k frequent items with at most k counters (Metwally et al.)"""
+
+    def __init__(self, k=64):
+        self.k = k
+        self.counts = {}
+
+    def add(self, item, n=1):
+        if item in self.counts:
+            self.counts[item] += n
+        elif len(self.counts) < self.k:
+            self.counts[item] = n
+        else:
+            # Evict the smallest counter; the newcomer inherits its count as error bound
+            smallest = min(self.counts, key=self.counts.get)
+            self.counts[item] = self.counts.pop(smallest) + n
+
+    def add_many(self, items):
+        unique, counts = np.unique(np.asarray(items, dtype=object).astype(str), return_counts=True)
+        for item, n in sorted(zip(unique.tolist(), counts.tolist()), key=lambda pair: -pair[1]):
+            self.add(item, n)
+
+    def _floor(self):
+        return min(self.counts.values()) if len(self.counts) >= self.k else 0
+
+    def merge(self, other):
+        floor, other_floor = self._floor(), other._floor()
+        merged = {
+            item: self.counts.get(item, floor) + other.counts.get(item, other_floor)
+            for item in set(self.counts) | set(other.counts)
+        }
+        self.counts = dict(sorted(merged.items(), key=lambda pair: -pair[1])[:self.k])
+
+    def top(self, n):
+        return sorted(self.counts.items(), key=lambda pair: -pair[1])[:n]
+
+
+class TDigest:
+    """Mergeable quantile sketch (Dunning's t-digest with the k1 scale function)"""
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.buffer = []
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.buffer.append(value)
+        if len(self.buffer) >= 5 * self.compression:
+            self._flush()
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values):
+            self._compress(values, np.ones(len(values)))
+
+    def merge(self, other):
+        other._flush()
+        if len(other.means):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(other.means, other.weights)
+
+    def _flush(self):
+        if self.buffer:
+            values = np.array(self.buffer, dtype=np.float64)
+            self.buffer = []
+            self._compress(values, np.ones(len(values)))
+
+    def _compress(self, means, weights):
+        if means is not self.means and len(means):
+            self.min = min(self.min, float(means.min()))
+            self.max = max(self.max, float(means.max()))
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        # Group neighbours whose quantiles fall in the same unit of the k1 scale,
+        # which keeps centroids small near the tails and larger in the middle
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+        group = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, np.diff(group) != 0])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    @property
+    def count(self):
+        self._flush()
+        return float(self.weights.sum())
+
+    def quantile(self, q):
+        """Approximate value at quantile q in [0, 1] (None when empty)"""
+        self._flush()
+        if not len(self.means):
+            return None
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = np.cumsum(self.weights) - self.weights / 2
+        x = np.r_[self.min, self.means, self.max]
+        positions = np.r_[0.0, centers, self.weights.sum()]
+        return float(np.interp(q * self.weights.sum(), positions, x))
+
+    def cdf(self, value):
+        """Approximate fraction of values below value, in [0, 1] (None when empty)"""
+        self._flush()
+        if not len(self.means):
+            return None
+        total = self.weights.sum()
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return 1.0
+        if len(self.means) == 1:
+            return 0.5
+        centers = np.cumsum(self.weights) - self.weights / 2
+        x = np.r_[self.min, self.means, self.max]
+        positions = np.r_[0.0, centers, total]
+        # Ties (e.g. many zero shares) sit in the middle of their run of positions
+        low = np.interp(value, x, positions, left=0.0, right=total)
+        high = total - np.interp(-value, -x[::-1], total - positions[::-1], left=total, right=0.0)
+        return float((low + high) / 2 / total)
+
+
+class StatsSketch:
+    """Community aggregates in bounded memory, a drop-in for StatsAggregates.
+
+    Counts, the savings_ratio and base-currency income sums and the health split stay exact (they are
+    O(1) or tiny); distinct countries, top countries and savings_ratio
+    percentiles come from sketches, so memory does not grow with the number of
+    records or countries.
+    """
+
+    def __init__(self, top_k=5, precision=12, capacity=64, compression=100):
+        self.top_k = top_k
+        self.count = 0
+        self.savings_ratio_sum = 0.0
+        self.income_base_sum = 0.0
+        self.health = Counter()
+        self.distinct_countries = HyperLogLog(precision)
+        self.countries = SpaceSaving(capacity)
+        self.savings_ratios = TDigest(compression)
+
+    def add(self, country, savings_ratio, financial_health, income_base=0.0):
+        self.count += 1
+        self.savings_ratio_sum += savings_ratio
+        self.income_base_sum += income_base
+        self.health[financial_health] += 1
+        self.distinct_countries.add(country)
+        self.countries.add(country)
+        self.savings_ratios.add(savings_ratio)
+
+    def add_many(self, countries, savings_ratios, financial_health, incomes_base=None):
+        """Fold arrays of per-record values in with one sketch update per distinct value"""
+        savings_ratios = np.asarray(savings_ratios, dtype=np.float64)
+        self.count += len(savings_ratios)
+        self.savings_ratio_sum += float(savings_ratios.sum())
+        if incomes_base is not None:
+            self.income_base_sum += float(np.sum(incomes_base))
+        unique, counts = np.unique(np.asarray(financial_health, dtype=object).astype(str), return_counts=True)
+        self.health.update(dict(zip(unique.tolist(), counts.tolist())))
+        self.distinct_countries.add_many(countries)
+        self.countries.add_many(countries)
+        self.savings_ratios.add_many(savings_ratios)
+
+    def merge(self, other):
+        """Fold in a sketch built elsewhere, e.g. by a worker process"""
+        self.count += other.count
+        self.savings_ratio_sum += other.savings_ratio_sum
+        self.income_base_sum += other.income_base_sum
+        self.health.update(other.health)
+        self.distinct_countries.merge(other.distinct_countries)
+        self.countries.merge(other.countries)
+        self.savings_ratios.merge(other.savings_ratios)
+
+    def get_statistics(self):
+        if not self.count:
+            return None
+
+        percentiles = {p: self.savings_ratios.quantile(p / 100) for p in PERCENTILES}
+        return {
+            'total_users': self.count,
+            'countries_represented': self.distinct_countries.count(),
+            'avg_savings_ratio': self.savings_ratio_sum / self.count,
+            'median_savings_ratio': percentiles[50],
+            'savings_ratio_percentiles': percentiles,
+            'avg_income_base': self.income_base_sum / self.count,
+            'financial_health_distribution': dict(self.health.most_common()),
+            'top_countries': dict(self.countries.top(self.top_k))
+        }
@@ -0,0 +1,248 @@
+"""Arrow IPC and Parquet snapshots of community stats records.
+
+A snapshot holds one row per stored analysis with the columns of StatsRecord
+plus the income band. Countries and health labels are dictionary-encoded, so
+the record layout matches the in-memory ring store column for column.
+
+Arrow IPC files (.arrow, .feather) are written uncompressed and opened through
+a memory map, so even multi-GB snapshots open instantly, and aggregation reads
+the column buffers in place as NumPy arrays without creating Python objects
+per record. Parquet files (.parquet, .pq) are smaller but are decoded on read
+(and store timestamps in milliseconds).
+
+pyarrow is optional and only needed here and for Parquet/Arrow files in the CLI.
+"""
+import os
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+from budgetbuddy.currency import CurrencyTable
+from budgetbuddy.ingest import IngestQueue
+from budgetbuddy.stats import RingBufferStatsStore, SQLiteStatsStore, StatsAggregates, income_band
+
+FORMATS = {
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+}
+
+BATCH_SIZE = 65536
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Arrow and Parquet support requires pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def snapshot_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported snapshot type '{ext}' (expected one of {', '.join(sorted(FORMATS))})")
+    return FORMATS[ext]
+
+
+def record_schema():
+    pa = require_pyarrow()
+    return pa.schema([
+        ('country', pa.dictionary(pa.int16(), pa.string())),
+        ('income_level', pa.float64()),
+        ('income_base', pa.float64()),
+        ('savings_ratio', pa.float64()),
+        ('financial_health', pa.dictionary(pa.int8(), pa.string())),
+        ('timestamp', pa.timestamp('s', tz='UTC')),
+        ('income_band', pa.uint8()),
+    ])
+
+
+def _record_batch(schema, country_codes, countries, income_level, income_base, savings_ratio,
+                  health_codes, health_levels, timestamp, band):
+    pa = require_pyarrow()
+    return pa.RecordBatch.from_arrays([
+        pa.DictionaryArray.from_arrays(pa.array(country_codes, pa.int16()), pa.array(countries, pa.string())),
+        pa.array(income_level, pa.float64()),
+        pa.array(income_base, pa.float64()),
+        # The ring store keeps float32; widening it is exact and SQLite's REAL stays lossless
+        pa.array(savings_ratio, pa.float64()),
+        pa.DictionaryArray.from_arrays(pa.array(health_codes, pa.int8()), pa.array(health_levels, pa.string())),
+        pa.array(timestamp, pa.int64()).cast(pa.timestamp('s', tz='UTC')),
+        pa.array(band, pa.uint8()),
+    ], schema=schema)
+
+
+def _ring_batches(store, schema):
+    with store.lock:
+        stats_columns = store.columns
+        # Oldest first; the copies let the store keep writing while batches are encoded
+        order = np.r_[stats_columns.start:stats_columns.size, 0:stats_columns.start]
+        columns = {name: column[order] for name, column in stats_columns.columns.items()}
+        countries = list(stats_columns.countries)
+        health_levels = list(stats_columns.health_levels)
+    for start in range(0, len(order), BATCH_SIZE):
+        part = {name: column[start:start + BATCH_SIZE] for name, column in columns.items()}
+        yield _record_batch(
+            schema, part['country'], countries, part['income_level'], part['income_base'],
+            part['savings_ratio'], part['financial_health'], health_levels, part['timestamp'],
+            part['income_band']
+        )
+
+
+def _sqlite_batches(conn, schema, columns=('income_base', 'income_band')):
+    # One read transaction, so the vocabularies cover every row read after them
+    conn.execute('BEGIN')
+    try:
+        # The IPC file format allows one dictionary per field, so every batch
+        # is encoded against vocabularies read up front, as in the ring store
+        countries, health_levels = (
+            [row[0] for row in conn.execute(f'SELECT DISTINCT {column} FROM user_stats ORDER BY {column}')]
+            for column in ('country', 'financial_health')
+        )
+        country_codes = {country: code for code, country in enumerate(countries)}
+        health_codes = {health: code for code, health in enumerate(health_levels)}
+        # Databases from before a column was added compute it on the fly, as the migration would
+        income_base = 'income_base' if 'income_base' in columns else 'to_base(country, income_level)'
+        band = 'income_band' if 'income_band' in columns else 'income_band(country, income_level)'
+        cursor = conn.execute(
+            f'SELECT country, income_level, {income_base}, savings_ratio, financial_health, '
+            f'CAST(timestamp AS INTEGER), {band} FROM user_stats ORDER BY id'
+        )
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            country, income_level, income_base, savings_ratio, health, timestamp, band = zip(*rows)
+            yield _record_batch(
+                schema, [country_codes[value] for value in country], countries, income_level, income_base,
+                savings_ratio, [health_codes[value] for value in health], health_levels, timestamp, band
+            )
+    finally:
+        conn.rollback()
+
+
+def _connect_read_only(db_path, currencies=None):
+    """Read-only connection to a stats database, and the columns of its user_stats table.
+
+    Unlike SQLiteStatsStore this never migrates the schema or changes the
+    journal mode, so it is safe on a database a running app is writing to.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No stats database at '{db_path}'")
+    currencies = currencies or CurrencyTable.load()
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True)
+    conn.create_function('income_band', 2, income_band, deterministic=True)
+    conn.create_function('to_base', 2, lambda country, amount: float(currencies.to_base(amount, country)),
+                         deterministic=True)
+    try:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(user_stats)')]
+    except sqlite3.DatabaseError:
+        columns = []
+    if not columns:
+        conn.close()
+        raise ValueError(f"'{db_path}' is not a BudgetBuddy stats database")
+    return conn, columns
+
+
+def _database_batches(conn, columns, schema):
+    try:
+        yield from _sqlite_batches(conn, schema, columns)
+    finally:
+        conn.close()
+
+
+def record_batches(store):
+    """Yield the store's records, oldest first, as Arrow record batches of record_schema()"""
+    if isinstance(store, IngestQueue):
+        store.flush()
+        store = store.store
+    schema = record_schema()
+    if isinstance(store, RingBufferStatsStore):
+        return _ring_batches(store, schema)
+    if isinstance(store, SQLiteStatsStore):
+        if store.path in ('', ':memory:'):
+            # Nothing else can open a private database; copy it out under the lock instead
+            with store.lock:
+                return iter(list(_sqlite_batches(store.conn, schema)))
+        # A connection of our own, so the store (and its ingest writer) is not blocked meanwhile
+        return _database_batches(*_connect_read_only(store.path), schema)
+    raise ValueError(f"{type(store).__name__} keeps no per-record history to export")
+
+
+def write_snapshot(batches, path, schema=None):
+    """Write record batches to an Arrow IPC or Parquet file; returns the number of rows"""
+    pa = require_pyarrow()
+    schema = schema or record_schema()
+    fmt = snapshot_format(path)
+    rows = 0
+    if fmt == 'arrow':
+        writer = pa.ipc.new_file(path, schema)
+    else:
+        writer = pa.parquet.ParquetWriter(path, schema)
+    try:
+        with writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    except BaseException:
+        # Don't leave a truncated snapshot behind
+        os.remove(path)
+        raise
+    return rows
+
+
+def export_stats(store, path):
+    """Snapshot every record of a stats store (or the store behind an IngestQueue); returns the row count"""
+    return write_snapshot(record_batches(store), path)
+
+
+def export_database(db_path, path, currencies=None):
+    """Snapshot every record of a SQLite stats database file; returns the row count.
+
+    The database is opened read-only (see _connect_read_only).
+    """
+    conn, columns = _connect_read_only(db_path, currencies)
+    return write_snapshot(_database_batches(conn, columns, record_schema()), path)
+
+
+def open_snapshot(path):
+    """Open a snapshot as a pyarrow Table; Arrow IPC files are memory-mapped, not read"""
+    pa = require_pyarrow()
+    if snapshot_format(path) == 'arrow':
+        return pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return pa.parquet.read_table(path, memory_map=True)
+
+
+def aggregate_snapshot(table, top_k=5):
+    """StatsAggregates over every record of a snapshot table.
+
+    Each chunk is grouped by (country, health) dictionary codes with
+    np.bincount over the column buffers, so the cost is one pass over the
+    numbers plus one add per group.
+    """
+    aggregates = StatsAggregates(top_k)
+    for batch in table.to_batches():
+        if not batch.num_rows:
+            continue
+        country = batch.column('country')
+        health = batch.column('financial_health')
+        levels = len(health.dictionary)
+        keys = country.indices.to_numpy().astype(np.intp) * levels + health.indices.to_numpy()
+        groups = len(country.dictionary) * levels
+        counts = np.bincount(keys, minlength=groups)
+        savings_ratio_sums = np.bincount(
+            keys, weights=batch.column('savings_ratio').to_numpy(), minlength=groups
+        )
+        income_base_sums = np.bincount(keys, weights=batch.column('income_base').to_numpy(), minlength=groups)
+        countries = country.dictionary.to_pylist()
+        health_levels = health.dictionary.to_pylist()
+        for key in np.flatnonzero(counts).tolist():
+            aggregates.add(countries[key // levels], float(savings_ratio_sums[key]),
+                           health_levels[key % levels], int(counts[key]), float(income_base_sums[key]))
+    return aggregates
@@ -0,0 +1,464 @@
+"""Community statistics: running aggregates and storage backends"""
+from collections import Counter
+from bisect import bisect_right
+import heapq
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from budgetbuddy.advisor import DEFAULT_POVERTY_LINE, POVERTY_LINES
+from budgetbuddy.currency import CurrencyTable
+from budgetbuddy.metrics import timed
+from budgetbuddy.sketches import StatsSketch
+
+# Windowed queries are answered from hourly rollups, so windows are exact to the hour
+WINDOWS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+# Income bands as multiples of the country's poverty line for a family of four
+INCOME_BANDS = ('Below poverty line', 'Low', 'Middle', 'High')
+INCOME_BAND_EDGES = (1, 2, 5)
+
+def income_band(country, income_level):
+    """Index into INCOME_BANDS for a monthly income in the country's currency"""
+    poverty_line = POVERTY_LINES.get(country, DEFAULT_POVERTY_LINE)
+    return bisect_right(INCOME_BAND_EDGES, income_level / poverty_line)
+
+def window_start_hour(window, now=None):
+    """First hourly bucket covered by a window name from WINDOWS"""
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window '{window}' (expected one of {', '.join(WINDOWS)})")
+    now = time.time() if now is None else now
+    return int((now - WINDOWS[window]) // 3600)
+
+def rollup_key(record):
+    """(hour, (country, income band, financial health)) rollup cell of a StatsRecord"""
+    hour = int(record.timestamp // 3600)
+    return hour, (record.country, income_band(record.country, record.income_level), record.financial_health)
+
+class StatsRecord:
+    """One community-statistics record; slots and an epoch timestamp keep it small"""
+    
+    __slots__ = ('country', 'income_level', 'income_base', 'savings_ratio', 'financial_health', 'timestamp')
+    
+    def __init__(self, country, income_level, income_base, savings_ratio, financial_health, timestamp):
+        self.country = country
+        self.income_level = income_level
+        self.income_base = income_base
+        self.savings_ratio = savings_ratio
+        self.financial_health = financial_health
+        self.timestamp = timestamp
+
+class StatsAggregates:
+    """Running community aggregates so reads never rescan the history"""
+    
+    def __init__(self, top_k=5):
+        self.top_k = top_k
+        self.count = 0
+        self.savings_ratio_sum = 0.0
+        self.income_base_sum = 0.0
+        self.countries = Counter()
+        self.health = Counter()
+    
+    def add(self, country, savings_ratio, financial_health, n=1, income_base=0.0):
+        """Add n records; savings_ratio and income_base are sums over those records"""
+        self.count += n
+        self.savings_ratio_sum += savings_ratio
+        self.income_base_sum += income_base
+        self.countries[country] += n
+        self.health[financial_health] += n
+    
+    def merge(self, other):
+        """Fold in aggregates built elsewhere, e.g. by a worker process"""
+        self.count += other.count
+        self.savings_ratio_sum += other.savings_ratio_sum
+        self.income_base_sum += other.income_base_sum
+        self.countries.update(other.countries)
+        self.health.update(other.health)
+    
+    def remove(self, country, savings_ratio, financial_health, income_base=0.0):
+        self.count -= 1
+        self.savings_ratio_sum -= savings_ratio
+        self.income_base_sum -= income_base
+        for counter, key in ((self.countries, country), (self.health, financial_health)):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+    
+    def get_statistics(self):
+        if not self.count:
+            return None
+        
+        # Heap selection over the distinct countries, independent of history length
+        top_countries = heapq.nlargest(self.top_k, self.countries.items(), key=lambda item: item[1])
+        return {
+            'total_users': self.count,
+            'countries_represented': len(self.countries),
+            'avg_savings_ratio': self.savings_ratio_sum / self.count,
+            'avg_income_base': self.income_base_sum / self.count,
+            'financial_health_distribution': dict(self.health.most_common()),
+            'top_countries': dict(top_countries)
+        }
+
+class TimeRollup:
+    """Hourly (country, income band, health) counts, savings_ratio and base-currency income sums"""
+    
+    def __init__(self):
+        self.hours = {}
+    
+    def add(self, hour, key, savings_ratio, income_base):
+        cell = self.hours.setdefault(hour, {}).setdefault(key, [0, 0.0, 0.0])
+        cell[0] += 1
+        cell[1] += savings_ratio
+        cell[2] += income_base
+    
+    def remove(self, hour, key, savings_ratio, income_base):
+        """Undo one add; cells and hours that become empty are dropped"""
+        cells = self.hours[hour]
+        cell = cells[key]
+        cell[0] -= 1
+        cell[1] -= savings_ratio
+        cell[2] -= income_base
+        if not cell[0]:
+            del cells[key]
+            if not cells:
+                del self.hours[hour]
+    
+    def prune(self, before_hour):
+        """Drop every hour older than before_hour"""
+        for hour in [hour for hour in self.hours if hour < before_hour]:
+            del self.hours[hour]
+    
+    def query(self, start_hour, end_hour, country=None, band=None):
+        """Yield (country, income_band, financial_health, n, savings_ratio_sum, income_base_sum) per group"""
+        for hour in range(start_hour, end_hour + 1):
+            for (row_country, row_band, health), (n, total, income) in self.hours.get(hour, {}).items():
+                if (country is None or row_country == country) and (band is None or row_band == band):
+                    yield row_country, row_band, health, n, total, income
+
+class StatsColumns:
+    """Records as preallocated NumPy columns, used as a ring once capacity is reached.
+    
+    Countries and health labels are stored as small-int codes into vocabularies
+    that grow on first sight, timestamps as int64 epoch seconds, and the income
+    band is precomputed, so a record takes 32 bytes.
+    """
+    
+    DTYPES = {
+        'country': np.int16,
+        'income_level': np.float64,
+        'income_base': np.float64,
+        'savings_ratio': np.float32,
+        'financial_health': np.uint8,
+        'timestamp': np.int64,
+        'income_band': np.uint8,
+    }
+    
+    def __init__(self, capacity=10000, initial_capacity=1024):
+        self.capacity = capacity
+        self.size = 0
+        # Slot of the oldest record; only moves once the ring is full
+        self.start = 0
+        length = min(initial_capacity, capacity)
+        self.columns = {name: np.empty(length, dtype=dtype) for name, dtype in self.DTYPES.items()}
+        self.countries = []
+        self.country_codes = {}
+        self.health_levels = []
+        self.health_codes = {}
+    
+    def __len__(self):
+        return self.size
+    
+    @staticmethod
+    def _encode(values, codes, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+    
+    def _grow(self):
+        length = min(self.capacity, 2 * len(self.columns['timestamp']))
+        for name, column in self.columns.items():
+            grown = np.empty(length, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+    
+    def append(self, record):
+        """Store a record; returns the slot it went to, or (slot, evicted row) when the ring wrapped"""
+        evicted = None
+        if self.size == self.capacity:
+            slot = self.start
+            evicted = self.row(slot)
+            self.start = (self.start + 1) % self.capacity
+        else:
+            if self.size == len(self.columns['timestamp']):
+                self._grow()
+            slot = self.size
+            self.size += 1
+        columns = self.columns
+        columns['country'][slot] = self._encode(self.countries, self.country_codes, record.country)
+        columns['income_level'][slot] = record.income_level
+        columns['income_base'][slot] = record.income_base
+        columns['savings_ratio'][slot] = record.savings_ratio
+        columns['financial_health'][slot] = self._encode(
+            self.health_levels, self.health_codes, record.financial_health
+        )
+        columns['timestamp'][slot] = int(record.timestamp)
+        columns['income_band'][slot] = income_band(record.country, record.income_level)
+        return slot, evicted
+    
+    def row(self, slot):
+        """(country, savings_ratio, financial_health, income_base, hour, income_band) of one slot"""
+        columns = self.columns
+        return (
+            self.countries[columns['country'][slot]],
+            float(columns['savings_ratio'][slot]),
+            self.health_levels[columns['financial_health'][slot]],
+            float(columns['income_base'][slot]),
+            int(columns['timestamp'][slot] // 3600),
+            int(columns['income_band'][slot]),
+        )
+
+class RingBufferStatsStore:
+    """Bounded in-memory stats store keeping the most recent records in NumPy columns.
+    
+    Running aggregates and hourly rollups are updated on append and on
+    eviction, so neither kind of read scans the records.
+    """
+    
+    def __init__(self, capacity=10000):
+        self.columns = StatsColumns(capacity)
+        self.aggregates = StatsAggregates()
+        self.rollup = TimeRollup()
+        self.latest_hour = None
+        self.lock = threading.Lock()
+    
+    def _append(self, record):
+        slot, evicted = self.columns.append(record)
+        if evicted is not None:
+            country, savings_ratio, financial_health, income_base, hour, band = evicted
+            self.aggregates.remove(country, savings_ratio, financial_health, income_base)
+            self.rollup.remove(hour, (country, band, financial_health), savings_ratio, income_base)
+        # Aggregate the stored (float32) savings ratio so eviction subtracts exactly what was added
+        country, savings_ratio, financial_health, income_base, hour, band = self.columns.row(slot)
+        self.aggregates.add(country, savings_ratio, financial_health, income_base=income_base)
+        self.rollup.add(hour, (country, band, financial_health), savings_ratio, income_base)
+        if self.latest_hour is None or hour > self.latest_hour:
+            self.latest_hour = hour
+    
+    def append(self, record):
+        with self.lock:
+            self._append(record)
+    
+    def append_many(self, records):
+        with self.lock:
+            for record in records:
+                self._append(record)
+    
+    def get_statistics(self):
+        with self.lock:
+            return self.aggregates.get_statistics()
+    
+    def query_window(self, start_hour, country=None, band=None):
+        with self.lock:
+            end_hour = start_hour if self.latest_hour is None else self.latest_hour
+            return list(self.rollup.query(start_hour, end_hour, country, band))
+
+class SketchStatsStore:
+    """Unbounded-history stats store in bounded memory.
+    
+    All-time statistics come from a StatsSketch (approximate distinct and top
+    countries, savings_ratio percentiles); windowed queries from hourly
+    rollups kept only as far back as the longest window.
+    """
+    
+    def __init__(self, **sketch_options):
+        self.sketch = StatsSketch(**sketch_options)
+        self.rollup = TimeRollup()
+        self.latest_hour = None
+        self.lock = threading.Lock()
+    
+    def _append(self, record):
+        hour, key = rollup_key(record)
+        self.sketch.add(record.country, record.savings_ratio, record.financial_health,
+                        record.income_base)
+        self.rollup.add(hour, key, record.savings_ratio, record.income_base)
+        if self.latest_hour is None or hour > self.latest_hour:
+            self.latest_hour = hour
+            self.rollup.prune(hour - max(WINDOWS.values()) // 3600)
+    
+    def append(self, record):
+        with self.lock:
+            self._append(record)
+    
+    def append_many(self, records):
+        with self.lock:
+            for record in records:
+                self._append(record)
+    
+    def merge(self, sketch):
+        """Fold in a StatsSketch built elsewhere, e.g. by batch scoring workers"""
+        with self.lock:
+            self.sketch.merge(sketch)
+    
+    def get_statistics(self):
+        with self.lock:
+            return self.sketch.get_statistics()
+    
+    def query_window(self, start_hour, country=None, band=None):
+        with self.lock:
+            end_hour = max(self.rollup.hours, default=start_hour)
+            return list(self.rollup.query(start_hour, end_hour, country, band))
+
+class SQLiteStatsStore:
+    """Persistent stats store in an embedded SQLite database"""
+    
+    def __init__(self, path, currencies=None):
+        currencies = currencies or CurrencyTable.load()
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.create_function('income_band', 2, income_band, deterministic=True)
+        self.conn.create_function('to_base', 2, lambda country, amount: float(currencies.to_base(amount, country)),
+                                  deterministic=True)
+        self.aggregates = StatsAggregates()
+        self.last_id = 0
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            if path != ':memory:':
+                # WAL lets every Streamlit process on the node read while one writes
+                self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_stats (
+                    id INTEGER PRIMARY KEY,
+                    country TEXT NOT NULL,
+                    income_level REAL NOT NULL,
+                    savings_ratio REAL NOT NULL,
+                    financial_health TEXT NOT NULL,
+                    timestamp REAL NOT NULL
+                )
+            """)
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_user_stats_country ON user_stats (country)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_user_stats_timestamp ON user_stats (timestamp)')
+            columns = [row[1] for row in self.conn.execute('PRAGMA table_info(user_stats)')]
+            if 'income_band' not in columns:
+                self.conn.execute('ALTER TABLE user_stats ADD COLUMN income_band INTEGER')
+                self.conn.execute('UPDATE user_stats SET income_band = income_band(country, income_level)')
+            if 'income_base' not in columns:
+                self.conn.execute('ALTER TABLE user_stats ADD COLUMN income_base REAL')
+                self.conn.execute('UPDATE user_stats SET income_base = to_base(country, income_level)')
+            # Hourly rollup maintained on insert; windowed queries read only this table
+            hourly_columns = [row[1] for row in self.conn.execute('PRAGMA table_info(user_stats_hourly)')]
+            if hourly_columns and 'income_base_sum' not in hourly_columns:
+                # Rebuilt below from user_stats with the new column
+                self.conn.execute('DROP TABLE user_stats_hourly')
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_stats_hourly (
+                    hour INTEGER NOT NULL,
+                    country TEXT NOT NULL,
+                    income_band INTEGER NOT NULL,
+                    financial_health TEXT NOT NULL,
+                    n INTEGER NOT NULL,
+                    savings_ratio_sum REAL NOT NULL,
+                    income_base_sum REAL NOT NULL,
+                    PRIMARY KEY (hour, country, income_band, financial_health)
+                ) WITHOUT ROWID
+            """)
+            if not self.conn.execute('SELECT 1 FROM user_stats_hourly LIMIT 1').fetchone():
+                self.conn.execute("""
+                    INSERT INTO user_stats_hourly
+                    SELECT CAST(timestamp / 3600 AS INTEGER), country, income_band, financial_health,
+                           COUNT(*), SUM(savings_ratio), TOTAL(income_base)
+                    FROM user_stats GROUP BY 1, 2, 3, 4
+                """)
+    
+    def append(self, record):
+        self.append_many([record])
+    
+    def append_many(self, records):
+        """Insert records and update the hourly rollup in one transaction"""
+        rows = []
+        for record in records:
+            timestamp = record.timestamp
+            rows.append((record.country, record.income_level, record.savings_ratio,
+                         record.financial_health, timestamp,
+                         income_band(record.country, record.income_level), record.income_base))
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT INTO user_stats (country, income_level, savings_ratio, financial_health, timestamp, '
+                'income_band, income_base) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self.conn.executemany(
+                'INSERT INTO user_stats_hourly VALUES (?, ?, ?, ?, 1, ?, ?) '
+                'ON CONFLICT (hour, country, income_band, financial_health) DO UPDATE SET '
+                'n = n + 1, savings_ratio_sum = savings_ratio_sum + excluded.savings_ratio_sum, '
+                'income_base_sum = income_base_sum + excluded.income_base_sum',
+                [(int(timestamp // 3600), country, band, health, savings_ratio, income_base)
+                 for country, _, savings_ratio, health, timestamp, band, income_base in rows]
+            )
+    
+    def _catch_up(self):
+        """Fold rows written since the last read (by any process) into the aggregates"""
+        (max_id,) = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM user_stats').fetchone()
+        if max_id <= self.last_id:
+            return
+        rows = self.conn.execute(
+            'SELECT country, financial_health, COUNT(*), SUM(savings_ratio), TOTAL(income_base) FROM user_stats '
+            'WHERE id > ? AND id <= ? GROUP BY country, financial_health',
+            (self.last_id, max_id)
+        ).fetchall()
+        for country, financial_health, n, savings_ratio_sum, income_base_sum in rows:
+            self.aggregates.add(country, savings_ratio_sum, financial_health, n, income_base_sum)
+        self.last_id = max_id
+    
+    def get_statistics(self):
+        with self.lock:
+            self._catch_up()
+            return self.aggregates.get_statistics()
+    
+    def query_window(self, start_hour, country=None, band=None):
+        sql = ('SELECT country, income_band, financial_health, SUM(n), SUM(savings_ratio_sum), SUM(income_base_sum) '
+               'FROM user_stats_hourly WHERE hour >= ?')
+        params = [start_hour]
+        if country is not None:
+            sql += ' AND country = ?'
+            params.append(country)
+        if band is not None:
+            sql += ' AND income_band = ?'
+            params.append(band)
+        with self.lock:
+            return self.conn.execute(sql + ' GROUP BY country, income_band, financial_health', params).fetchall()
+
+class UserStatistics:
+    def __init__(self, store=None, currencies=None):
+        self.store = store if store is not None else RingBufferStatsStore()
+        self.currencies = currencies or CurrencyTable.load()
+    
+    @timed('add_user_data')
+    def add_user_data(self, country, income_level, savings_ratio, financial_health):
+        # Incomes are normalized at ingest so cross-country averages share one currency
+        self.store.append(StatsRecord(
+            country, income_level, float(self.currencies.to_base(income_level, country)),
+            savings_ratio, financial_health, time.time()
+        ))
+    
+    @timed('get_statistics')
+    def get_statistics(self):
+        return self.store.get_statistics()
+    
+    @timed('get_window_statistics')
+    def get_window_statistics(self, window, country=None, income_band=None, now=None):
+        """get_statistics restricted to the last hour/day/week, a country and/or an income band.
+        
+        income_band is an index into INCOME_BANDS. Every store answers from
+        hourly rollups kept up to date on write, so the cost depends on the hours
+        and groups in the window, not on the number of records.
+        """
+        aggregates = StatsAggregates()
+        for row_country, _, health, n, savings_ratio_sum, income_base_sum in self.store.query_window(
+            window_start_hour(window, now), country, income_band
+        ):
+            aggregates.add(row_country, savings_ratio_sum, health, n, income_base_sum)
+        return aggregates.get_statistics()
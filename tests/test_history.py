@@ -0,0 +1,77 @@
+"""BudgetHistory: calendar-month windows kept as running sums"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from budgetbuddy.history import BudgetHistory, month_index
+
+CATEGORIES = ['Food', 'Transport']
+
+
+def expected_means(months, rows, latest, w):
+    def mean(first, last):
+        selected = [row for month, row in zip(months, rows) if first <= month <= last]
+        return np.mean(selected, axis=0) if selected else None
+    return mean(latest - w + 1, latest), mean(latest - 2 * w + 1, latest - w)
+
+
+@pytest.mark.parametrize('max_months', [None, 24])
+def test_window_sums_match_recomputation(max_months):
+    rng = np.random.default_rng(0)
+    history = BudgetHistory(CATEGORIES, capacity=2, max_months=max_months)
+    months, rows = [], []
+    month = month_index('2020-01')
+    for _ in range(200):
+        # Mostly consecutive, with gaps and re-recorded months
+        month += int(rng.choice([0, 1, 1, 1, 2, 5, 13]))
+        income = float(rng.integers(1, 10_000))
+        expenses = {category: float(rng.integers(0, 5000)) for category in CATEGORIES}
+        history.record(f"{month // 12}-{month % 12 + 1:02d}", income, expenses)
+        row = [(income - sum(expenses.values())) / income] + [expenses[c] / income for c in CATEGORIES]
+        if months and months[-1] == month:
+            rows[-1] = row
+        else:
+            months.append(month)
+            rows.append(row)
+        for w in history.windows:
+            current, previous = expected_means(months, rows, month, w)
+            assert history.rolling_savings_ratio(w) == pytest.approx(current[0])
+            trends = history.category_trends(w)
+            if previous is None:
+                assert trends == {}
+            else:
+                assert list(trends.values()) == pytest.approx((current - previous)[1:].tolist())
+
+
+def test_skipped_months_are_left_out_of_windows():
+    history = BudgetHistory(CATEGORIES)
+    history.record('2026-01', 1000, {'Food': 900})
+    history.record('2026-06', 1000, {'Food': 500})
+    # January is outside the 3-month window ending in June, and inside the one before it
+    assert history.rolling_savings_ratio(3) == pytest.approx(0.5)
+    assert history.category_trends(3)['Food'] == pytest.approx(-0.4)
+    assert history.rolling_savings_ratio(6) == pytest.approx(0.3)
+    assert history.category_trends(6) == {}
+    month_over_month = history.month_over_month()
+    assert month_over_month['previous_month'] == date(2026, 1, 1)
+    assert month_over_month['savings_ratio'] == pytest.approx(0.4)
+
+
+def test_latest_month_is_replaced():
+    history = BudgetHistory(CATEGORIES)
+    history.record('2026-01', 1000, {'Food': 500})
+    history.record('2026-02', 1000, {'Food': 500})
+    history.record('2026-02', 1000, {'Food': 100})
+    assert len(history) == 2
+    assert history.rolling_savings_ratio(3) == pytest.approx(0.7)
+    assert history.month_over_month()['expense_shares']['Food'] == pytest.approx(-0.4)
+
+
+def test_months_must_be_recorded_in_order():
+    history = BudgetHistory(CATEGORIES)
+    history.record('2026-03', 1000, {})
+    with pytest.raises(ValueError):
+        history.record('2026-02', 1000, {})
+    with pytest.raises(ValueError):
+        BudgetHistory(CATEGORIES, max_months=12)
@@ -0,0 +1,104 @@
+"""Recommendation rules: RuleSet evaluation and analyze_batch parity"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from budgetbuddy.advisor import DEFAULT_POVERTY_LINE, POVERTY_LINES, RECOMMENDATIONS, AIBudgetAdvisor
+from budgetbuddy.poverty import LOCATIONS
+from budgetbuddy.rules import RuleSet
+
+HOUSEHOLDS = 3000
+
+
+@pytest.fixture(scope='module')
+def advisor():
+    return AIBudgetAdvisor()
+
+
+def random_households(advisor, n, seed=0, family_size=None):
+    rng = np.random.default_rng(seed)
+    data = {
+        'country': rng.choice(advisor.country_names + ['Atlantis'], n),
+        'family_size': rng.integers(1, 12, n) if family_size is None else np.full(n, family_size),
+        'location_type': rng.choice(list(LOCATIONS), n),
+    }
+    income_scale = rng.choice([0, 1e3, 1e4, 1e5], n)
+    for category in advisor.income_categories:
+        data[f"inc_{category}"] = np.round(rng.random(n) * income_scale * rng.integers(0, 2, n))
+    for category in advisor.expense_categories:
+        data[f"exp_{category}"] = np.round(rng.random(n) * income_scale * 0.4)
+    return pd.DataFrame(data)
+
+
+def budgets(advisor, row):
+    income = {category: row[f"inc_{category}"] for category in advisor.income_categories}
+    expenses = {category: row[f"exp_{category}"] for category in advisor.expense_categories}
+    return income, expenses
+
+
+def legacy_recommendations(income, expenses, country):
+    """The if-chain the rule table replaced, for a family of four"""
+    total_income = sum(income.values())
+    if total_income == 0:
+        return [RECOMMENDATIONS['start_tracking'], RECOMMENDATIONS['stable_income']]
+    savings_ratio = (total_income - sum(expenses.values())) / total_income
+    checks = [
+        ('essential_needs', total_income < POVERTY_LINES.get(country, DEFAULT_POVERTY_LINE)),
+        ('emergency_fund', savings_ratio < 0.1),
+        ('food', expenses.get('Food', 0) / total_income > 0.4),
+        ('transport', expenses.get('Transport', 0) / total_income > 0.2),
+        ('utilities', expenses.get('Utilities', 0) / total_income > 0.15),
+        ('great_job', savings_ratio > 0.2),
+    ]
+    return [RECOMMENDATIONS[key] for key, fired in checks if fired]
+
+
+def test_rules_match_legacy_recommendations(advisor):
+    households = random_households(advisor, HOUSEHOLDS, family_size=4).drop(columns='location_type')
+    batch = advisor.analyze_batch(households)
+    for (_, row), (_, result) in zip(households.iterrows(), batch.iterrows()):
+        income, expenses = budgets(advisor, row)
+        expected = legacy_recommendations(income, expenses, row['country'])
+        assert advisor.analyze_spending_patterns(income, expenses, row['country'], 4)['recommendations'] == expected
+        assert advisor.batch_recommendations(result) == expected
+
+
+def test_batch_matches_single(advisor):
+    households = random_households(advisor, HOUSEHOLDS, seed=1)
+    batch = advisor.analyze_batch(households)
+    for (_, row), (_, result) in zip(households.iterrows(), batch.iterrows()):
+        income, expenses = budgets(advisor, row)
+        single = advisor.analyze_spending_patterns(
+            income, expenses, row['country'], row['family_size'], row['location_type']
+        )
+        assert advisor.batch_recommendations(result) == single['recommendations']
+        assert result['poverty_line'] == pytest.approx(single['poverty_line'])
+        assert result['savings_ratio'] == pytest.approx(single['savings_ratio'])
+        assert result['financial_health'] == single['financial_health']
+
+
+def test_country_overrides_and_income_requirement():
+    rules = RuleSet([
+        {'id': 'low', 'metric': 'savings_ratio', 'op': '<', 'threshold': 0.1,
+         'overrides': {'Japan': 0.2}, 'message': 'low'},
+        {'id': 'none', 'metric': 'total_income', 'op': '==', 'threshold': 0, 'requires_income': False,
+         'message': 'none'},
+    ], ['India', 'Japan'])
+    flags = rules.evaluate(
+        np.array([[0.15, 1000], [0.15, 1000], [0.15, 1000], [0.0, 0]]),
+        np.array([0, 1, -1, 0]),
+        np.array([True, True, True, False])
+    )
+    assert flags.tolist() == [[False, False], [True, False], [False, False], [False, True]]
+
+
+@pytest.mark.parametrize('rule', [
+    {'metric': 'savings_ratio', 'op': '<', 'threshold': 0.1, 'message': 'no id'},
+    {'id': 'x', 'metric': 'debt', 'op': '<', 'threshold': 0.1, 'message': 'bad metric'},
+    {'id': 'x', 'metric': 'expense_share', 'op': '>', 'threshold': 0.1, 'message': 'no category'},
+    {'id': 'x', 'metric': 'savings_ratio', 'op': '!=', 'threshold': 0.1, 'message': 'bad op'},
+    {'id': 'x', 'metric': 'savings_ratio', 'op': '<', 'threshold': 0.1, 'overrides': {'Mars': 0}, 'message': 'x'},
+])
+def test_invalid_rules_raise(rule):
+    with pytest.raises(ValueError):
+        RuleSet([rule], ['India'])
@@ -0,0 +1,85 @@
+"""Arrow IPC and Parquet snapshot round-trips"""
+import sqlite3
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from budgetbuddy.snapshots import (  # noqa: E402
+    BATCH_SIZE, aggregate_snapshot, export_database, export_stats, open_snapshot, record_batches
+)
+from budgetbuddy.stats import RingBufferStatsStore, SQLiteStatsStore, StatsRecord  # noqa: E402
+
+NOW = 1_800_000_000
+
+# More rows than one batch, with a country and health level that only appear in the last one
+RECORDS = (
+    [StatsRecord('India', 50_000, 600.0, 0.1 + i * 1e-9, 'Good', NOW + i) for i in range(BATCH_SIZE + 4464)]
+    + [StatsRecord('Kenya', 20_000, 150.0, -0.3, 'Needs Improvement', NOW) for _ in range(10)]
+)
+
+
+def assert_round_trip(table, store):
+    assert table.num_rows == len(RECORDS)
+    assert table.column('country').to_pylist()[-11:] == ['India'] + ['Kenya'] * 10
+    assert table.column('savings_ratio')[1].as_py() == pytest.approx(RECORDS[1].savings_ratio, abs=1e-8)
+    actual, expected = aggregate_snapshot(table).get_statistics(), store.get_statistics()
+    for key in ('avg_savings_ratio', 'avg_income_base'):
+        assert actual.pop(key) == pytest.approx(expected.pop(key))
+    assert actual == expected
+
+
+@pytest.fixture
+def database(tmp_path):
+    store = SQLiteStatsStore(str(tmp_path / 'stats.db'))
+    store.append_many(RECORDS)
+    return store
+
+
+@pytest.mark.parametrize('suffix', ['.arrow', '.parquet'])
+def test_database_round_trip(database, tmp_path, suffix):
+    path = str(tmp_path / f"stats{suffix}")
+    assert export_database(database.path, path) == len(RECORDS)
+    table = open_snapshot(path)
+    assert_round_trip(table, database)
+    # SQLite's REAL savings ratio survives exactly
+    assert table.column('savings_ratio')[1].as_py() == RECORDS[1].savings_ratio
+
+
+@pytest.mark.parametrize('suffix', ['.arrow', '.parquet'])
+def test_ring_round_trip(tmp_path, suffix):
+    store = RingBufferStatsStore(capacity=len(RECORDS))
+    store.append_many(RECORDS)
+    path = str(tmp_path / f"ring{suffix}")
+    assert export_stats(store, path) == len(RECORDS)
+    assert_round_trip(open_snapshot(path), store)
+
+
+def test_store_export_does_not_hold_the_lock(database):
+    batches = record_batches(database)
+    next(batches)
+    assert database.lock.acquire(blocking=False)
+    database.lock.release()
+    assert sum(batch.num_rows for batch in batches) == len(RECORDS) - BATCH_SIZE
+
+
+def test_export_leaves_database_unmigrated(tmp_path):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE user_stats (id INTEGER PRIMARY KEY, country TEXT, income_level REAL, '
+                 'savings_ratio REAL, financial_health TEXT, timestamp REAL)')
+    conn.execute("INSERT INTO user_stats VALUES (1, 'India', 500000, 0.3, 'Good', ?)", (NOW,))
+    conn.commit()
+    conn.close()
+    before = path.read_bytes()
+    assert export_database(str(path), str(tmp_path / 'old.arrow')) == 1
+    assert path.read_bytes() == before
+    assert open_snapshot(str(tmp_path / 'old.arrow')).column('income_base')[0].as_py() > 0
+
+
+def test_invalid_database_leaves_no_snapshot(tmp_path):
+    path = tmp_path / 'junk.db'
+    path.write_text('not a database' * 100)
+    with pytest.raises(ValueError):
+        export_database(str(path), str(tmp_path / 'junk.arrow'))
+    assert not (tmp_path / 'junk.arrow').exists()
@@ -0,0 +1,85 @@
+"""Stats stores: ring eviction and the hourly rollups behind window queries"""
+import numpy as np
+import pytest
+
+from budgetbuddy.stats import (
+    WINDOWS, RingBufferStatsStore, SQLiteStatsStore, StatsRecord, UserStatistics, income_band, rollup_key
+)
+
+NOW = 1_800_000_000
+
+
+def random_records(n, seed=0, hours=200):
+    rng = np.random.default_rng(seed)
+    countries = ['India', 'Kenya', 'Japan', 'Atlantis']
+    return [
+        StatsRecord(
+            str(rng.choice(countries)), float(rng.integers(0, 200_000)), float(rng.integers(0, 5000)),
+            float(np.float32(rng.random())), str(rng.choice(['Good', 'Needs Improvement'])),
+            NOW - int(rng.integers(0, hours * 3600)) if i < n - 1 else NOW
+        )
+        for i in range(n)
+    ]
+
+
+def expected_window(records, window, country=None):
+    start_hour = (NOW - WINDOWS[window]) // 3600
+    selected = [
+        record for record in records
+        if record.timestamp // 3600 >= start_hour and (country is None or record.country == country)
+    ]
+    if not selected:
+        return None
+    return len(selected), sum(record.savings_ratio for record in selected)
+
+
+def test_ring_eviction_keeps_aggregates_of_retained_records():
+    store = RingBufferStatsStore(capacity=3)
+    records = [StatsRecord(country, 1000, 10.0, ratio, 'Good', NOW)
+               for country, ratio in [('India', 0.5), ('Kenya', 0.25), ('India', 0.125), ('Japan', 0.0)]]
+    store.append_many(records)
+    stats = store.get_statistics()
+    assert stats['total_users'] == 3
+    assert stats['top_countries'] == {'Kenya': 1, 'India': 1, 'Japan': 1}
+    assert stats['avg_savings_ratio'] == pytest.approx(0.375 / 3)
+    assert stats['avg_income_base'] == pytest.approx(10.0)
+
+
+def test_ring_rollups_drop_evicted_hours():
+    store = RingBufferStatsStore(capacity=2)
+    store.append_many([StatsRecord('India', 1000, 0, 0.5, 'Good', NOW - 3 * 3600 * i) for i in (2, 1, 0)])
+    assert sorted(store.rollup.hours) == [(NOW - 3 * 3600) // 3600, NOW // 3600]
+
+
+@pytest.mark.parametrize('window', list(WINDOWS))
+@pytest.mark.parametrize('country', [None, 'Kenya'])
+def test_ring_windows_match_retained_records(window, country):
+    records = random_records(5000)
+    store = RingBufferStatsStore(capacity=1000)
+    store.append_many(records)
+    stats = UserStatistics(store).get_window_statistics(window, country, now=NOW)
+    expected = expected_window(records[-1000:], window, country)
+    if expected is None:
+        assert stats is None
+    else:
+        assert stats['total_users'] == expected[0]
+        assert stats['avg_savings_ratio'] == pytest.approx(expected[1] / expected[0])
+
+
+def test_sqlite_windows_match_ring(tmp_path):
+    records = random_records(2000, seed=1)
+    ring = UserStatistics(RingBufferStatsStore(capacity=len(records)))
+    sqlite = UserStatistics(SQLiteStatsStore(str(tmp_path / 'stats.db')))
+    ring.store.append_many(records)
+    sqlite.store.append_many(records)
+    for window in WINDOWS:
+        for band in (None, 0, 2):
+            expected = ring.get_window_statistics(window, income_band=band, now=NOW)
+            actual = sqlite.get_window_statistics(window, income_band=band, now=NOW)
+            assert actual['total_users'] == expected['total_users']
+            assert actual['avg_savings_ratio'] == pytest.approx(expected['avg_savings_ratio'])
+
+
+def test_rollup_key_uses_hour_and_income_band():
+    record = StatsRecord('India', 100_000, 0, 0.2, 'Good', NOW)
+    assert rollup_key(record) == (NOW // 3600, ('India', income_band('India', 100_000), 'Good'))